@@ -1,14 +1,13 @@
 import utime
-from machine import I2C, Pin
-from lcd_api import LcdApi
 from pico_i2c_lcd import I2cLcd
+from i2ctune import lcd_bus
 
 
 I2C_ADDR     = 39
 I2C_NUM_ROWS = 2
 I2C_NUM_COLS = 16
 
-i2c = I2C(0, sda=machine.Pin(0), scl=machine.Pin(1), freq=400000)
+i2c, freq = lcd_bus(0, 0, 1, I2C_ADDR)
 lcd = I2cLcd(i2c, I2C_ADDR, I2C_NUM_ROWS, I2C_NUM_COLS)
 
 def greeting():
@@ -27,7 +26,7 @@ def greeting():
 def customcharacter():
     
   #character      
-  lcd.custom_char(0, bytearray([
+  lcd.define_glyph("character", bytearray([
   0x0E,
   0x0E,
   0x04,
@@ -40,7 +39,7 @@ def customcharacter():
         ]))
   
     #character2      
-  lcd.custom_char(1, bytearray([
+  lcd.define_glyph("character2", bytearray([
     0x1F,
   0x15,
   0x1F,
@@ -56,7 +55,7 @@ def customcharacter():
   
   
   #smiley
-  lcd.custom_char(2, bytearray([
+  lcd.define_glyph("smiley", bytearray([
   0x00,
   0x00,
   0x0A,
@@ -69,7 +68,7 @@ def customcharacter():
         ]))
   
   #heart
-  lcd.custom_char(3, bytearray([
+  lcd.define_glyph("heart", bytearray([
    0x00,
   0x00,
   0x0A,
@@ -82,7 +81,7 @@ def customcharacter():
         ]))
   
       #note
-  lcd.custom_char(4, bytearray([
+  lcd.define_glyph("note", bytearray([
    0x01,
   0x03,
   0x05,
@@ -94,7 +93,7 @@ def customcharacter():
         
         ]))
     #celcius
-  lcd.custom_char(5, bytearray([
+  lcd.define_glyph("celcius", bytearray([
   0x07,
   0x05,
   0x07,
@@ -106,21 +105,25 @@ def customcharacter():
         
         ]))
   
+  # Upload all six in one transfer. Glyphs that are already in CGRAM
+  # are not sent again.
+  return lcd.load_glyphs(("character", "character2", "smiley", "heart",
+                          "note", "celcius"))
 
     
 
     
 greeting()    
-customcharacter()
+glyphs = customcharacter()
 lcd.move_to(0,0)
 lcd.putstr("Custom Character")
 lcd.move_to(0,1)
-lcd.putchar(chr(0))
+lcd.putchar(glyphs[0])
 lcd.move_to(4,1)
-lcd.putchar(chr(1))
+lcd.putchar(glyphs[1])
 lcd.move_to(8,1)
-lcd.putchar(chr(2))
+lcd.putchar(glyphs[2])
 lcd.move_to(12,1)
-lcd.putchar(chr(3))
+lcd.putchar(glyphs[3])
 lcd.move_to(15,1)
-lcd.putchar(chr(4))
+lcd.putchar(glyphs[4])
@@ -1,5 +1,18 @@
-import machine
-sda = machine.Pin(0)
-scl = machine.Pin(1)
-i2c = machine.I2C(0,sda=sda,scl=scl, freq=400000)
-print(i2c.scan())
\ No newline at end of file
+from i2cprobe import Inventory
+from i2ctune import lcd_bus, tune
+
+inventory = Inventory()
+print(inventory.report())
+print("%d us%s" % (inventory.elapsed_us,
+                   " (cached)" if inventory.cached else ""))
+for entry in inventory.buses:
+    for device in entry['devices']:
+        if device['kind'] == 'lcd_backpack':
+            i2c, freq = lcd_bus(entry['bus'], entry['sda'], entry['scl'],
+                                device['addr'])
+        elif device['kind'] == 'pcf8574':
+            i2c, freq = tune(entry['bus'], entry['sda'], entry['scl'],
+                             device['addr'])
+        else:
+            continue
+        print("0x%02x: %d Hz" % (device['addr'], freq))
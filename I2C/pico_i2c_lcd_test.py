@@ -1,9 +1,7 @@
 import utime
 
-import machine
-from machine import I2C
-from lcd_api import LcdApi
 from pico_i2c_lcd import I2cLcd
+from i2ctune import lcd_bus
 
 I2C_ADDR     = 0x27
 I2C_NUM_ROWS = 4
@@ -12,7 +10,8 @@ I2C_NUM_COLS = 20
 def test_main():
     #Test function for verifying basic functionality
     print("Running test_main")
-    i2c = I2C(0, sda=machine.Pin(0), scl=machine.Pin(1), freq=400000)
+    i2c, freq = lcd_bus(0, 0, 1, I2C_ADDR)
+    print("I2C at %d Hz" % freq)
     lcd = I2cLcd(i2c, I2C_ADDR, I2C_NUM_ROWS, I2C_NUM_COLS)    
     lcd.putstr("It Works!")
     utime.sleep(2)
@@ -1,34 +1,69 @@
-from time import sleep
+from time import ticks_add, ticks_diff, ticks_ms
 from machine import Pin
 from machine import PWM
+from servo_planner import ServoPlanner
+from edgeinput import EdgeInput
+
+CLOSED_DUTY = 5500
+OPEN_DUTY = 9000
+HOLD_MS = 5000
 
 l = Pin(25, Pin.OUT)
-s = machine.Pin(1, Pin.IN, Pin.PULL_UP)
-lock = machine.Pin(16, Pin.OUT)
-ope = machine.Pin(17, Pin.OUT)
-go = machine.Pin(18, Pin.OUT)
-clo = machine.Pin(19, Pin.OUT)
+s = EdgeInput(Pin(1, Pin.IN, Pin.PULL_UP), debounce_ms=20)
+lock = Pin(16, Pin.OUT)
+ope = Pin(17, Pin.OUT)
+go = Pin(18, Pin.OUT)
+clo = Pin(19, Pin.OUT)
 
 
 pwm = PWM(Pin(2))
 pwm.freq(50)
+servo = ServoPlanner(pwm, CLOSED_DUTY)
+
+state = 'closed'
+hold_until = 0
+lock.value(1)
 
 print("program start")
 while True:
-    if s() == 1:
-        ope.value(1)
-        lock.value(0)
-        for pos in range(5500,9000,50):
-            pwm.duty_u16(pos)
-            sleep(0.03)
-        go.value(1)
-        ope.value(0)
-        sleep(5)
-        clo.value(1)
-        go.value(0)
-        for pos in range(9000, 5500, -50):
-            pwm.duty_u16(pos)
-            sleep(0.03)
-        clo.value(0)
+    if state == 'closed':
+        timeout = None
+    elif state == 'open':
+        timeout = max(0, ticks_diff(hold_until, ticks_ms()))
     else:
-        lock.value(1)
+        timeout = servo.remaining_ms()
+    event = s.wait(timeout)
+    seen = event is not None and event[0] == 1
+    now = ticks_ms()
+    if state == 'closed':
+        if seen:
+            ope.value(1)
+            lock.value(0)
+            servo.move_to(OPEN_DUTY)
+            state = 'opening'
+    elif state == 'opening':
+        if not servo.moving():
+            go.value(1)
+            ope.value(0)
+            hold_until = ticks_add(now, HOLD_MS)
+            state = 'open'
+    elif state == 'open':
+        if seen or s.value() == 1:
+            hold_until = ticks_add(now, HOLD_MS)
+        elif ticks_diff(hold_until, now) <= 0:
+            clo.value(1)
+            go.value(0)
+            servo.move_to(CLOSED_DUTY)
+            state = 'closing'
+    elif state == 'closing':
+        if seen:
+            clo.value(0)
+            ope.value(1)
+            servo.move_to(OPEN_DUTY)
+            state = 'opening'
+        elif not servo.moving():
+            clo.value(0)
+            lock.value(1)
+            state = 'closed'
+            print("closed, wake-up latency %d us mean, %d us worst" % (
+                s.mean_latency_us(), s.worst_us))
@@ -1,30 +1,32 @@
 from machine import Pin
 from utime import sleep
+from edgeinput import EdgeInput
+from traffic import NO_DETECTOR, Actuated, PhaseEngine, mask
 
-led1 = Pin(13, Pin.OUT)
-led2 = Pin(14, Pin.OUT)
-led3 = Pin(15, Pin.OUT)
-led4 = Pin(18, Pin.OUT)
-led5 = Pin(17, Pin.OUT)
-led6 = Pin(16, Pin.OUT)
+ACTUATED = False
+
+LAMPS = (13, 14, 15, 18, 17, 16)
+PHASES = (
+    (mask(13, 16), 5000),
+    (mask(14, 16), 5000),
+    (mask(15, 18), 5000),
+    (mask(15, 17), 5000),
+)
+ACTUATED_PHASES = (
+    (mask(13, 16), 5000, 30000, 0),
+    (mask(14, 16), 5000, 5000, NO_DETECTOR),
+    (mask(15, 18), 5000, 30000, 1),
+    (mask(15, 17), 5000, 5000, NO_DETECTOR),
+)
+
+if ACTUATED:
+    main_road = EdgeInput(Pin(2, Pin.IN), debounce_ms=20)
+    side_road = EdgeInput(Pin(3, Pin.IN), debounce_ms=20)
+    engine = Actuated(LAMPS, ACTUATED_PHASES,
+                      (main_road.value, side_road.value), gap_ms=3000)
+else:
+    engine = PhaseEngine(LAMPS, PHASES)
+engine.start()
 while True:
-    led1.value(1)
-    led6.value(1)
-    sleep(5)
-    led2.value(1)
-    led1.value(0)
-    sleep(5)
-    led3.value(1)
-    led4.value(1)
-    led6.value(0)
-    led2.value(0)
-    sleep(5)
-    led5.value(1)
-    led4.value(0)
-    sleep(5)
-    led1.value(0)
-    led2.value(0)
-    led3.value(0)
-    led4.value(0)
-    led5.value(0)
-    led6.value(0)
+    sleep(20)
+    print("cycle %d, worst jitter %d us" % (engine.cycles, engine.worst_us))
@@ -0,0 +1,164 @@
+# Traffic replay for the junction of Traffic light.py, fixed-time against
+# actuated, run against the simulated board in sim/.
+#
+# Vehicles arrive on the main road and the side road from a seeded random
+# schedule, queue at the stop line while their light isn't green and leave
+# one every HEADWAY_MS while it is. A stop-line presence detector per
+# approach (GP2, GP3) is high while a vehicle waits on it or for
+# OCCUPY_MS after one drives over it. The lights are driven by the real
+# traffic.PhaseEngine / traffic.Actuated code through the simulated GPIOs,
+# and the harness reads the lamps back to decide who may go.
+#
+# Reports, per scenario and controller, the vehicles served, the average
+# and worst wait per vehicle and what was still queued at the end (those
+# count with the wait they had so far). Fails if the actuated controller
+# has a longer average wait than the fixed one anywhere.
+#
+#   python bench/actuated.py
+#   python bench/actuated.py --minutes 120 --seed 7
+
+import argparse
+import os
+import random
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path[:0] = [os.path.join(ROOT, 'sim'), os.path.join(ROOT, 'lib')]
+
+import simcore                  # noqa: E402
+from simcore import clock       # noqa: E402
+
+simcore.install()
+
+import machine                  # noqa: E402
+from traffic import NO_DETECTOR, Actuated, PhaseEngine, mask  # noqa: E402
+
+LAMPS = (13, 14, 15, 18, 17, 16)
+MAIN_GREEN, SIDE_GREEN = 13, 18
+DETECTORS = (2, 3)
+
+# Traffic light.py as it is.
+FIXED = (
+    (mask(13, 16), 5000),
+    (mask(14, 16), 5000),
+    (mask(15, 18), 5000),
+    (mask(15, 17), 5000),
+)
+
+# The same lamps and yellows, with greens of 5 to 30 s.
+ACTUATED = (
+    (mask(13, 16), 5000, 30000, 0),
+    (mask(14, 16), 5000, 5000, NO_DETECTOR),
+    (mask(15, 18), 5000, 30000, 1),
+    (mask(15, 17), 5000, 5000, NO_DETECTOR),
+)
+
+# Vehicles per hour on (main road, side road).
+SCENARIOS = (
+    ('light', (150, 150)),
+    ('balanced', (400, 300)),
+    ('main heavy', (900, 120)),
+    ('side quiet', (600, 20)),
+)
+
+STEP_MS = 100
+HEADWAY_MS = 2000               # saturation flow: one vehicle per 2 s
+OCCUPY_MS = 1000                # detector occupancy of a passing vehicle
+
+
+def arrivals(rate_per_hour, minutes, rng):
+    # Poisson arrival times in msec.
+    times = []
+    t = 0.0
+    if rate_per_hour:
+        while True:
+            t += rng.expovariate(rate_per_hour / 3600000.0)
+            if t >= minutes * 60000:
+                break
+            times.append(int(t))
+    return times
+
+
+def run(controller, rates, minutes, seed):
+    simcore.reset()
+    rng = random.Random(seed)
+    schedules = [arrivals(rate, minutes, rng) for rate in rates]
+    for gpio in DETECTORS:
+        machine.drive(gpio, 0)
+    detectors = [machine.Pin(gpio, machine.Pin.IN).value
+                 for gpio in DETECTORS]
+    if controller == 'fixed':
+        engine = PhaseEngine(LAMPS, FIXED)
+    else:
+        engine = Actuated(LAMPS, ACTUATED, detectors)
+    engine.start()
+
+    greens = (MAIN_GREEN, SIDE_GREEN)
+    queues = [[], []]
+    nxt = [0, 0]                # next arrival in each schedule
+    free_at = [0, 0]            # when the stop line can take the next one
+    passed_at = [-OCCUPY_MS, -OCCUPY_MS]
+    waits = []
+    start_us = clock.now_us
+    for step in range(minutes * 60000 // STEP_MS):
+        now = step * STEP_MS
+        for a in (0, 1):
+            schedule = schedules[a]
+            while nxt[a] < len(schedule) and schedule[nxt[a]] <= now:
+                queues[a].append(schedule[nxt[a]])
+                nxt[a] += 1
+            if (queues[a] and now >= free_at[a]
+                    and machine.pin_level(greens[a])):
+                waits.append(now - queues[a].pop(0))
+                free_at[a] = now + HEADWAY_MS
+                passed_at[a] = now
+            machine.drive(DETECTORS[a], 1 if queues[a] or (
+                now - passed_at[a] < OCCUPY_MS) else 0)
+        clock.advance_to(start_us + (step + 1) * STEP_MS * 1000)
+    engine.stop()
+
+    end = minutes * 60000
+    served = len(waits)
+    queued = len(queues[0]) + len(queues[1])
+    waits += [end - t for t in queues[0] + queues[1]]
+    return {
+        'served': served,
+        'queued': queued,
+        'mean_s': sum(waits) / max(1, len(waits)) / 1000.0,
+        'worst_s': max(waits or [0]) / 1000.0,
+        'gap_outs': getattr(engine, 'gap_outs', 0),
+        'max_outs': getattr(engine, 'max_outs', 0),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='fixed-time against actuated traffic light replay')
+    parser.add_argument('--minutes', type=int, default=60,
+                        help='traffic to replay per scenario (default 60)')
+    parser.add_argument('--seed', type=int, default=1,
+                        help='arrival schedule seed (default 1)')
+    args = parser.parse_args(argv)
+
+    failed = False
+    print('%-12s %-10s %8s %8s %10s %10s %14s' % (
+        'scenario', 'control', 'served', 'queued', 'mean wait',
+        'worst wait', 'gap/max outs'))
+    for name, rates in SCENARIOS:
+        results = {}
+        for controller in ('fixed', 'actuated'):
+            r = run(controller, rates, args.minutes, args.seed)
+            results[controller] = r
+            print('%-12s %-10s %8d %8d %9.1fs %9.1fs %14s' % (
+                name, controller, r['served'], r['queued'], r['mean_s'],
+                r['worst_s'], '%d/%d' % (r['gap_outs'], r['max_outs'])
+                if controller == 'actuated' else ''))
+        if results['actuated']['mean_s'] > results['fixed']['mean_s']:
+            print('    FAIL: actuated waits longer than fixed')
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,171 @@
+# Green-wave check for traffic.Corridor, run against the simulated board in
+# sim/.
+#
+# Sets up a corridor of 1 to 4 junctions along one road, each wired and
+# timed like Traffic light.py, with offsets from traffic.green_wave(), and
+# runs it for a number of cycles on the virtual clock. The lamp states are
+# then rebuilt from the recorded SIO register writes and checked:
+#
+#   - every junction turns green on the main road exactly at its offset in
+#     every cycle (no drift, however long it runs);
+#   - every transition is a single register write from a single timer
+#     callback, however many junctions there are;
+#   - a vehicle leaving the first junction at any point of its green, at
+#     the design speed, meets green at every junction after it. The same
+#     traffic with all offsets 0 is shown for comparison.
+#
+#   python bench/green_wave.py
+#   python bench/green_wave.py --speed 40 --cycles 500
+
+import argparse
+import bisect
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path[:0] = [os.path.join(ROOT, 'sim'), os.path.join(ROOT, 'lib')]
+
+import simcore                  # noqa: E402
+from simcore import clock, recorder  # noqa: E402
+
+simcore.install()
+
+from traffic import Corridor, green_wave, mask  # noqa: E402
+
+# Junctions along the road, in metres from the first one.
+DISTANCES = (0, 300, 550, 900)
+
+PHASE_MS = 5000
+
+
+def junction(base):
+    # GPIOs base..base+5: main road green, yellow, red, side road green,
+    # yellow, red. The same four phases as Traffic light.py.
+    green, yellow, red = base, base + 1, base + 2
+    side_green, side_yellow, side_red = base + 3, base + 4, base + 5
+    phases = (
+        (mask(green, side_red), PHASE_MS),
+        (mask(yellow, side_red), PHASE_MS),
+        (mask(red, side_green), PHASE_MS),
+        (mask(red, side_yellow), PHASE_MS),
+    )
+    return tuple(range(base, base + 6)), phases
+
+
+def run(count, speed_kmh, cycles, coordinated=True):
+    simcore.reset()
+    recorder.enabled = True
+    layouts = [junction(6 * j) for j in range(count)]
+    cycle_ms = sum(d for _, d in layouts[0][1])
+    if coordinated:
+        offsets = green_wave(DISTANCES[:count], speed_kmh, cycle_ms)
+    else:
+        offsets = [0] * count
+    corridor = Corridor([(gpios, phases, offset) for (gpios, phases), offset
+                         in zip(layouts, offsets)])
+    corridor.start()
+    host_start = time.perf_counter()
+    clock.advance(cycles * corridor.cycle_ms * 1000)
+    host_s = time.perf_counter() - host_start
+    end_us = clock.now_us
+
+    # Lamp state after each register write.
+    times, states = [], []
+    out = 0
+    for t, kind, _, value in recorder.events:
+        if kind == 'mem32':
+            out ^= value
+            times.append(t)
+            states.append(out)
+    callbacks = recorder.count('timer')
+    corridor.stop()
+
+    def lit(gpio, t_us):
+        i = bisect.bisect_right(times, t_us) - 1
+        return i >= 0 and (states[i] >> gpio) & 1
+
+    problems = []
+    worst_us = 0
+    cycle_us = corridor.cycle_ms * 1000
+    for j, (gpios, _) in enumerate(layouts):
+        # Green onsets after start(), which may come in mid-green.
+        onsets = [t for i, t in enumerate(times) if i
+                  and (states[i] >> gpios[0]) & 1
+                  and not (states[i - 1] >> gpios[0]) & 1]
+        if len(onsets) < cycles - 1:
+            problems.append('junction %d turned green %d times in %d cycles'
+                            % (j, len(onsets), cycles))
+        for t in onsets:
+            error = (t - offsets[j] * 1000) % cycle_us
+            worst_us = max(worst_us, min(error, cycle_us - error))
+    if worst_us:
+        problems.append('green starts off by up to %d us' % worst_us)
+    # The first write is start() lighting the first phase.
+    transitions = len(times) - 1
+    if callbacks != transitions:
+        problems.append('%d timer callbacks for %d transitions' % (
+            callbacks, transitions))
+
+    # Vehicles leaving the first junction every 500 msec of its green, if
+    # they reach the last junction before the run ends.
+    travel_ms = DISTANCES[count - 1] * 3600 / speed_kmh
+    vehicles = stops = 0
+    for k in range(cycles):
+        start_ms = offsets[0] + k * corridor.cycle_ms
+        for depart_ms in range(start_ms, start_ms + PHASE_MS, 500):
+            if (depart_ms + travel_ms) * 1000 >= end_us:
+                break
+            vehicles += 1
+            for j in range(1, count):
+                arrive_us = int((depart_ms + DISTANCES[j] * 3600 / speed_kmh)
+                                * 1000)
+                if not lit(layouts[j][0][0], arrive_us):
+                    stops += 1
+                    break
+    return {
+        'rows': len(corridor.masks),
+        'writes': transitions,
+        'callbacks': callbacks,
+        'worst_us': worst_us,
+        'host_us': 1e6 * host_s / max(1, callbacks),
+        'vehicles': vehicles,
+        'stopped': stops,
+        'offsets': offsets,
+    }, problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='green-wave check for traffic.Corridor on the simulator')
+    parser.add_argument('--speed', type=float, default=50,
+                        help='design speed in km/h (default 50)')
+    parser.add_argument('--cycles', type=int, default=200,
+                        help='signal cycles to run (default 200)')
+    args = parser.parse_args(argv)
+
+    failed = False
+    print('%-10s %-26s %6s %8s %10s %9s %10s %12s' % (
+        'junctions', 'offsets (ms)', 'rows', 'writes', 'callbacks',
+        'drift_us', 'host_us/cb', 'stopped'))
+    for count in range(1, len(DISTANCES) + 1):
+        for coordinated in (True, False):
+            result, problems = run(count, args.speed, args.cycles,
+                                   coordinated)
+            print('%-10s %-26s %6d %8d %10d %9d %10.1f %6d/%-5d' % (
+                '%d%s' % (count, '' if coordinated else ' (0)'),
+                ','.join(map(str, result['offsets'])), result['rows'],
+                result['writes'], result['callbacks'], result['worst_us'],
+                result['host_us'], result['stopped'], result['vehicles']))
+            if coordinated and result['stopped']:
+                problems.append('%d of %d vehicles stopped' % (
+                    result['stopped'], result['vehicles']))
+            for problem in problems:
+                print('    FAIL: %s' % problem)
+            failed = failed or bool(problems)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,264 @@
+# Bus-traffic benchmarks for the LCD drivers, run against the simulated
+# board in sim/.
+#
+# Each workload drives I2cLcd (PCF8574 backpack) and GpioLcd (4-bit and
+# 8-bit wiring) and reports what it cost on the wire: I2C transactions and
+# bytes, GPIO writes, enable pulses latched by the controller and the
+# cumulative delay the driver enforced with sleeps. Results are compared
+# against bench/baselines.json; any metric that got worse fails the run.
+#
+#   python bench/lcd_bench.py             # compare against the baselines
+#   python bench/lcd_bench.py --update    # record new baselines
+
+import argparse
+import json
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path[:0] = [os.path.join(ROOT, 'sim'), os.path.join(ROOT, 'lib')]
+
+import simcore                  # noqa: E402
+from simcore import clock, recorder  # noqa: E402
+
+simcore.install()
+
+import machine                  # noqa: E402
+import hd44780                  # noqa: E402
+import utime                    # noqa: E402
+from gpio_lcd import GpioLcd    # noqa: E402
+from pico_i2c_lcd import I2cLcd  # noqa: E402
+
+BASELINES = os.path.join(HERE, 'baselines.json')
+
+# Metrics where lower is better, in report order.
+METRICS = ('transactions', 'bytes', 'pin_writes', 'enable_pulses',
+           'delay_us')
+
+
+def make_i2c(num_lines, num_columns):
+    model = machine.attach_i2c(
+        hd44780.Pcf8574Lcd(0x27, num_lines, num_columns), 0, 1)
+    i2c = machine.I2C(0, sda=machine.Pin(0), scl=machine.Pin(1),
+                      freq=400000)
+    return I2cLcd(i2c, 0x27, num_lines, num_columns), model
+
+
+def make_gpio4(num_lines, num_columns):
+    Pin = machine.Pin
+    model = hd44780.GpioLcd(16, 17, (18, 19, 20, 21), num_lines=num_lines,
+                            num_columns=num_columns)
+    lcd = GpioLcd(rs_pin=Pin(16), enable_pin=Pin(17), d4_pin=Pin(18),
+                  d5_pin=Pin(19), d6_pin=Pin(20), d7_pin=Pin(21),
+                  num_lines=num_lines, num_columns=num_columns)
+    return lcd, model
+
+
+def make_gpio8(num_lines, num_columns):
+    Pin = machine.Pin
+    data = tuple(range(6, 14))
+    model = hd44780.GpioLcd(16, 17, data, num_lines=num_lines,
+                            num_columns=num_columns)
+    lcd = GpioLcd(Pin(16), Pin(17), *[Pin(i) for i in data],
+                  num_lines=num_lines, num_columns=num_columns)
+    return lcd, model
+
+
+HALS = {'i2c': make_i2c, 'gpio4': make_gpio4, 'gpio8': make_gpio8}
+
+
+# -- workloads --------------------------------------------------------------
+#
+# Each takes a freshly initialized driver and returns the text the display
+# should show afterwards, which is checked against the controller model.
+
+def clock_loop(lcd):
+    # The main loop of I2C/pico_i2c_lcd_test.py, 10 iterations, without
+    # the 2 s sleep.
+    for count in range(10):
+        lcd.clear()
+        time = utime.localtime()
+        lcd.putstr("{year:>04d}/{month:>02d}/{day:>02d} "
+                   "{HH:>02d}:{MM:>02d}:{SS:>02d}".format(
+                       year=time[0], month=time[1], day=time[2],
+                       HH=time[3], MM=time[4], SS=time[5]))
+        if count % 10 == 0:
+            lcd.show_cursor()
+        if count % 10 == 1:
+            lcd.hide_cursor()
+        if count % 10 == 2:
+            lcd.blink_cursor_on()
+        if count % 10 == 3:
+            lcd.blink_cursor_off()
+        if count % 10 == 4:
+            lcd.backlight_off()
+        if count % 10 == 5:
+            lcd.backlight_on()
+        if count % 10 == 6:
+            lcd.display_off()
+        if count % 10 == 7:
+            lcd.display_on()
+        if count % 10 == 8:
+            lcd.clear()
+            lcd.putstr(''.join(chr(x) for x in range(
+                32, 32 + lcd.num_lines * lcd.num_columns)))
+    return None
+
+
+def _weather_frame(lcd, temp, hum):
+    temp_f = temp * (9 / 5) + 32.0
+    lcd.move_to(0, 0)
+    lcd.putstr('Weather Monitor')
+    lcd.move_to(0, 1)
+    lcd.putstr('%2.0fC' % temp)
+    lcd.move_to(4, 1)
+    lcd.putstr('%3.1fF' % temp_f)
+    lcd.move_to(10, 1)
+    lcd.putstr('H:%2.0f%%' % hum)
+
+
+WEATHER = [(21, 48), (21, 48), (22, 48), (22, 49), (22, 49), (21, 49),
+           (21, 50), (21, 50), (20, 50), (20, 51)]
+
+
+def weather_direct(lcd):
+    # The weather monitor screen, redrawn 10 times as the original loop did.
+    for temp, hum in WEATHER:
+        _weather_frame(lcd, temp, hum)
+    return 'Weather Monitor \n20C 68.0F H:51% '
+
+
+def weather_framebuffer(lcd):
+    # The same 10 refreshes, drawn into the framebuffer and flushed.
+    lcd.framebuffer_on()
+    for temp, hum in WEATHER:
+        _weather_frame(lcd, temp, hum)
+        lcd.flush()
+    return 'Weather Monitor \n20C 68.0F H:51% '
+
+
+GLYPHS = (
+    bytes([0x0E, 0x0E, 0x04, 0x1F, 0x04, 0x0E, 0x0A, 0x0A]),
+    bytes([0x1F, 0x15, 0x1F, 0x1F, 0x1F, 0x0A, 0x0A, 0x1B]),
+    bytes([0x00, 0x00, 0x0A, 0x00, 0x15, 0x11, 0x0E, 0x00]),
+    bytes([0x00, 0x00, 0x0A, 0x15, 0x11, 0x0A, 0x04, 0x00]),
+    bytes([0x01, 0x03, 0x05, 0x09, 0x09, 0x0B, 0x1B, 0x18]),
+    bytes([0x07, 0x05, 0x07, 0x00, 0x00, 0x00, 0x00, 0x00]),
+)
+
+
+def glyph_demo(lcd):
+    # I2C/example.py: upload six glyphs, twice (the second time should be
+    # free), and show them.
+    for _ in range(2):
+        for location, charmap in enumerate(GLYPHS):
+            lcd.custom_char(location, charmap)
+    lcd.move_to(0, 0)
+    lcd.putstr("Custom Character")
+    for x, location in ((0, 0), (4, 1), (8, 2), (12, 3), (15, 4)):
+        lcd.move_to(x, 1)
+        lcd.putchar(chr(location))
+    return 'Custom Character\n\x00   \x01   \x02   \x03  \x04'
+
+
+def full_refresh(lcd):
+    # Rewrites every cell of the display, 5 times.
+    cells = lcd.num_lines * lcd.num_columns
+    for i in range(5):
+        lcd.move_to(0, 0)
+        lcd.putstr(''.join(chr(0x41 + (i + x) % 26) for x in range(cells)))
+    return None
+
+
+WORKLOADS = (
+    ('clock_loop', clock_loop, 4, 20),
+    ('weather_direct', weather_direct, 2, 16),
+    ('weather_framebuffer', weather_framebuffer, 2, 16),
+    ('glyph_demo', glyph_demo, 2, 16),
+    ('full_refresh', full_refresh, 4, 20),
+)
+
+
+def run(name, workload, hal, num_lines, num_columns):
+    simcore.reset()
+    lcd, model = HALS[hal](num_lines, num_columns)
+    controller = model.lcd
+    recorder.reset()
+    latches = controller.latches
+    violations = controller.violations
+    start_us = clock.now_us
+    expected = workload(lcd)
+    result = {
+        'transactions': recorder.count('i2c'),
+        'bytes': recorder.counters.get('i2c_bytes', 0),
+        'pin_writes': recorder.count('pin_write') + recorder.count('mem32'),
+        'enable_pulses': controller.latches - latches,
+        'delay_us': recorder.counters.get('sleep_us', 0),
+        'elapsed_us': clock.now_us - start_us,
+    }
+    problems = []
+    if controller.violations != violations:
+        problems.append('%d writes while busy' % (
+            controller.violations - violations))
+    if expected is not None and controller.text() != expected:
+        problems.append('display shows %r' % controller.text())
+    return result, problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='LCD bus-traffic benchmarks on the simulated board')
+    parser.add_argument('--update', action='store_true',
+                        help='write the results as the new baselines')
+    parser.add_argument('--tolerance', type=float, default=0.0,
+                        help='allowed relative regression (default 0)')
+    parser.add_argument('workloads', nargs='*',
+                        help='only run these workloads')
+    args = parser.parse_args(argv)
+
+    baselines = {}
+    if os.path.exists(BASELINES):
+        with open(BASELINES) as f:
+            baselines = json.load(f)
+
+    results = {}
+    failed = False
+    print('%-26s %12s %12s %12s %12s %12s' % (('workload',) + METRICS))
+    for name, workload, num_lines, num_columns in WORKLOADS:
+        if args.workloads and name not in args.workloads:
+            continue
+        for hal in HALS:
+            key = '%s/%s' % (name, hal)
+            result, problems = run(name, workload, hal, num_lines,
+                                   num_columns)
+            results[key] = result
+            base = baselines.get(key, {})
+            cells = []
+            for metric in METRICS:
+                value = result[metric]
+                cell = str(value)
+                if metric in base and value != base[metric]:
+                    cell += '%+.0f%%' % (
+                        100.0 * (value - base[metric]) / base[metric]
+                        if base[metric] else 100.0)
+                    if value > base[metric] * (1 + args.tolerance):
+                        problems.append('%s %d > baseline %d' % (
+                            metric, value, base[metric]))
+                cells.append(cell)
+            print('%-26s %12s %12s %12s %12s %12s' % tuple([key] + cells))
+            for problem in problems:
+                print('    FAIL: %s' % problem)
+            failed = failed or bool(problems)
+
+    if args.update:
+        baselines.update(results)
+        with open(BASELINES, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print('baselines written to %s' % BASELINES)
+    return 1 if failed and not args.update else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,78 @@
+from machine import Pin, PWM
+import dht
+from gpio_lcd import GpioLcd
+from dht_sampler import DhtSampler
+from hcsr04 import HCSR04
+from distfilter import MedianFilter, Presence
+import runtime
+import asyncio
+
+# Door, presence light and weather station on one Pico:
+#   LCD RS=16 E=17 D4-D7=18-21, DHT11 on 22
+#   IR sensor on 1, door servo on 2, lock/open/go/close outputs on 6-9
+#   HC-SR04 trigger 3, echo 4, presence light on 5
+
+lcd = GpioLcd(rs_pin=Pin(16),
+              enable_pin=Pin(17),
+              d4_pin=Pin(18),
+              d5_pin=Pin(19),
+              d6_pin=Pin(20),
+              d7_pin=Pin(21),
+              num_lines=2, num_columns=16)
+lcd.framebuffer_on()
+
+sensor = DhtSampler(dht.DHT11(Pin(22)))
+
+s = Pin(1, Pin.IN, Pin.PULL_UP)
+lock = Pin(6, Pin.OUT)
+ope = Pin(7, Pin.OUT)
+go = Pin(8, Pin.OUT)
+clo = Pin(9, Pin.OUT)
+pwm = PWM(Pin(2))
+pwm.freq(50)
+
+sonar = HCSR04(Pin(3, Pin.OUT), Pin(4, Pin.IN))
+led = Pin(5, Pin.OUT)
+smooth = MedianFilter(5)
+presence = Presence(enter_cm=50, exit_cm=70)
+
+def show_weather(sensor):
+    temp = sensor.temperature
+    hum = sensor.humidity
+    temp_f = temp * (9/5) + 32.0
+    lcd.move_to(0,0)
+    lcd.putstr('Weather Monitor')
+    lcd.move_to(0,1)
+    lcd.putstr('%2.0fC' %temp)
+    lcd.move_to(4,1)
+    lcd.putstr('%3.1fF' %temp_f)
+    lcd.move_to(10,1)
+    lcd.putstr('H:%2.0f%%' %hum)
+
+def show_presence(distance):
+    if distance is None:
+        distance = 400
+    if presence.update(smooth.update(distance)):
+        led.toggle()
+
+async def door():
+    while True:
+        if s() == 1:
+            ope.value(1)
+            lock.value(0)
+            await runtime.servo_ramp(pwm, 5500, 9000, 50, 30)
+            go.value(1)
+            ope.value(0)
+            await asyncio.sleep(5)
+            clo.value(1)
+            go.value(0)
+            await runtime.servo_ramp(pwm, 9000, 5500, 50, 30)
+            clo.value(0)
+        else:
+            lock.value(1)
+        await asyncio.sleep_ms(20)
+
+runtime.run(runtime.lcd_flush(lcd),
+            runtime.dht_read(sensor, show_weather),
+            runtime.ranging(sonar, 60, show_presence),
+            door())
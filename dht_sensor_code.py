@@ -3,19 +3,23 @@
 from machine import Pin
 from time import sleep
 import dht 
+from dht_sampler import DhtSampler
 
-sensor = dht.DHT22(Pin(14))
-#sensor = dht.DHT11(Pin(14))
+sensor = DhtSampler(dht.DHT22(Pin(14)))
+#sensor = DhtSampler(dht.DHT11(Pin(14)))
 
+stale = False
 while True:
-  try:
-    sleep(2)
-    sensor.measure()
-    temp = sensor.temperature()
-    hum = sensor.humidity()
-    temp_f = temp * (9/5) + 32.0
-    print('Temperature: %3.1f C' %temp)
-    print('Temperature: %3.1f F' %temp_f)
-    print('Humidity: %3.1f %%' %hum)
-  except OSError as e:
-    print('Failed to read sensor.')
\ No newline at end of file
+  sleep(0.5)
+  if sensor.stale != stale:
+    stale = sensor.stale
+    if stale:
+      print('Failed to read sensor.')
+  if not sensor.update():
+    continue
+  temp = sensor.temperature
+  hum = sensor.humidity
+  temp_f = temp * (9/5) + 32.0
+  print('Temperature: %3.1f C' %temp)
+  print('Temperature: %3.1f F' %temp_f)
+  print('Humidity: %3.1f %%' %hum)
\ No newline at end of file
@@ -0,0 +1,148 @@
+import dht
+from utime import ticks_add, ticks_diff, ticks_ms
+
+class DhtSampler:
+
+    # Wraps a dht.DHT11/DHT22 so that callers can ask for a reading as
+    # often as they like.
+    #
+    # The sensor is only measured when a new sample is due; in between,
+    # read() returns the cached values and their age. Samples are never
+    # closer than the model's minimum interval (1 s for the DHT11, 2 s for
+    # the DHT22, reading faster just returns the old conversion). While the
+    # readings hold steady, the interval doubles up to max_interval_ms; a
+    # change of step_t degrees or step_h %RH drops it back to the minimum.
+    #
+    # A failed read (OSError: timeout or bad checksum) or an implausible one
+    # is retried at the minimum interval, up to `retries` times in a row.
+    # After that the sampler gives up until the next regular sample and
+    # marks the last good reading as stale; it is still returned. Readings
+    # outside the model's range are rejected, and so are jumps larger than
+    # max_rate_t degrees or max_rate_h %RH per minute (plus one step of
+    # slack), unless the next reading confirms them. Errors never escape
+    # update() or read(); they are counted in failures and rejected.
+
+    MIN_INTERVAL_MS = {'DHT11': 1000, 'DHT22': 2000}
+    # Reporting range: min and max temperature, min and max humidity. The
+    # DHT11's narrower 20-90 %RH accuracy band doesn't bound what it
+    # reports, so it isn't used here.
+    LIMITS = {'DHT11': (0, 50, 0, 100), 'DHT22': (-40, 80, 0, 100)}
+
+    def __init__(self, sensor, max_interval_ms=30000, step_t=0.5, step_h=2.0,
+                 retries=3, max_rate_t=2.0, max_rate_h=10.0):
+        self.sensor = sensor
+        model = 'DHT11' if isinstance(sensor, dht.DHT11) else 'DHT22'
+        self.min_interval_ms = self.MIN_INTERVAL_MS[model]
+        self.limits = self.LIMITS[model]
+        self.max_interval_ms = max(max_interval_ms, self.min_interval_ms)
+        self.step_t = step_t
+        self.step_h = step_h
+        self.retries = retries
+        self.max_rate_t = max_rate_t
+        self.max_rate_h = max_rate_h
+        self.interval_ms = self.min_interval_ms
+        self.temperature = None
+        self.humidity = None
+        self.sampled_ms = 0
+        self.next_ms = ticks_ms()
+        self.stale = False
+        self.suspect = None
+        self.errors_in_row = 0
+        self.attempts = 0
+        self.samples = 0
+        self.failures = 0
+        self.rejected = 0
+        self.retried = 0
+
+    def due(self):
+        return ticks_diff(ticks_ms(), self.next_ms) >= 0
+
+    def update(self):
+        # Measures the sensor if a sample is due. Returns True if that gave
+        # a new good reading.
+        if not self.due():
+            return False
+        self.attempts += 1
+        try:
+            self.sensor.measure()
+            temperature = self.sensor.temperature()
+            humidity = self.sensor.humidity()
+        except OSError:
+            now = ticks_ms()
+            self.failures += 1
+            self.suspect = None
+            return self.retry(now)
+        # Timed from the end of the read, so that a retry can't come early
+        # enough to get the same conversion back.
+        now = ticks_ms()
+        if not self.plausible(temperature, humidity, now):
+            self.rejected += 1
+            return self.retry(now)
+        self.adapt(temperature, humidity)
+        self.temperature = temperature
+        self.humidity = humidity
+        self.sampled_ms = now
+        self.samples += 1
+        self.stale = False
+        self.suspect = None
+        self.errors_in_row = 0
+        self.next_ms = ticks_add(now, self.interval_ms)
+        return True
+
+    def retry(self, now):
+        self.errors_in_row += 1
+        if self.errors_in_row <= self.retries:
+            self.retried += 1
+            self.next_ms = ticks_add(now, self.min_interval_ms)
+        else:
+            self.errors_in_row = 0
+            self.stale = self.temperature is not None
+            self.next_ms = ticks_add(now, self.interval_ms)
+        return False
+
+    def plausible(self, temperature, humidity, now):
+        t_min, t_max, h_min, h_max = self.limits
+        if not (t_min <= temperature <= t_max and h_min <= humidity <= h_max):
+            return False
+        if self.temperature is None:
+            return True
+        minutes = ticks_diff(now, self.sampled_ms) / 60000
+        if (abs(temperature - self.temperature) <= (
+                self.step_t + self.max_rate_t * minutes) and
+                abs(humidity - self.humidity) <= (
+                self.step_h + self.max_rate_h * minutes)):
+            return True
+        # A jump. Believe it if the previous attempt saw the same one.
+        suspect = self.suspect
+        self.suspect = (temperature, humidity)
+        return (suspect is not None and
+                abs(temperature - suspect[0]) <= self.step_t and
+                abs(humidity - suspect[1]) <= self.step_h)
+
+    def adapt(self, temperature, humidity):
+        if self.temperature is None:
+            return
+        if (abs(temperature - self.temperature) >= self.step_t or
+                abs(humidity - self.humidity) >= self.step_h):
+            self.interval_ms = self.min_interval_ms
+        else:
+            self.interval_ms = min(2 * self.interval_ms, self.max_interval_ms)
+
+    def error_rate(self):
+        # Fraction of measurements that failed or were rejected.
+        if not self.attempts:
+            return 0.0
+        return (self.failures + self.rejected) / self.attempts
+
+    def age_ms(self):
+        # Milliseconds since the cached reading was taken, or None if there
+        # isn't one yet.
+        if self.temperature is None:
+            return None
+        return ticks_diff(ticks_ms(), self.sampled_ms)
+
+    def read(self):
+        # Returns (temperature, humidity, age_ms), measuring first if due.
+        # The values are None until the first good reading.
+        self.update()
+        return self.temperature, self.humidity, self.age_ms()
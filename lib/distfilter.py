@@ -0,0 +1,119 @@
+from array import array
+
+class MedianFilter:
+
+    # Running median over the last `size` readings.
+    #
+    # The readings are kept twice in preallocated arrays: in arrival order
+    # in a ring, and sorted. Each update drops the oldest reading from the
+    # sorted copy and inserts the new one, so a sample costs O(size) moves
+    # and no memory. A median of 5 rejects up to 2 outliers in a row, such
+    # as the odd missed or doubled echo.
+
+    def __init__(self, size=5):
+        self.size = size
+        self.ring = array('f', [0.0] * size)
+        self.sorted = array('f', [0.0] * size)
+        self.head = 0
+        self.count = 0
+        self.value = None
+
+    def update(self, reading):
+        ring = self.ring
+        ordered = self.sorted
+        n = self.count
+        if n == self.size:
+            # Drop the oldest reading from the sorted copy.
+            old = ring[self.head]
+            i = 0
+            while ordered[i] != old:
+                i += 1
+            n -= 1
+            while i < n:
+                ordered[i] = ordered[i + 1]
+                i += 1
+        else:
+            self.count += 1
+        head = self.head
+        ring[head] = reading
+        self.head = (head + 1) % self.size
+        # Insert the new one, read back from the ring so that it compares
+        # equal to the stored (single precision) copy later on.
+        reading = ring[head]
+        i = n
+        while i and ordered[i - 1] > reading:
+            ordered[i] = ordered[i - 1]
+            i -= 1
+        ordered[i] = reading
+        n += 1
+        if n & 1:
+            self.value = ordered[n >> 1]
+        else:
+            self.value = (ordered[(n >> 1) - 1] + ordered[n >> 1]) / 2
+        return self.value
+
+    def reset(self):
+        self.head = 0
+        self.count = 0
+        self.value = None
+
+class Kalman:
+
+    # One-dimensional Kalman filter for a slowly moving distance.
+    #
+    # q is the process noise (how much the true distance may wander between
+    # samples, cm^2) and r the measurement noise of the sensor (cm^2). A
+    # smaller q/r ratio smooths harder and follows real movement slower.
+
+    def __init__(self, q=4.0, r=25.0):
+        self.q = q
+        self.r = r
+        self.value = None
+        self.p = r
+
+    def update(self, reading):
+        if self.value is None:
+            self.value = reading
+            self.p = self.r
+            return reading
+        p = self.p + self.q
+        gain = p / (p + self.r)
+        self.value += gain * (reading - self.value)
+        self.p = (1 - gain) * p
+        return self.value
+
+    def reset(self):
+        self.value = None
+        self.p = self.r
+
+class Presence:
+
+    # Turns a filtered distance into "somebody is there" with hysteresis:
+    # present once the distance has been below enter_cm for `hold` samples
+    # in a row, and absent again only after it has been above exit_cm for
+    # as long. update() returns True on the sample where somebody arrives.
+
+    def __init__(self, enter_cm=50, exit_cm=70, hold=2):
+        self.enter_cm = enter_cm
+        self.exit_cm = exit_cm
+        self.hold = hold
+        self.present = False
+        self.run = 0
+        self.arrivals = 0
+
+    def update(self, distance):
+        if self.present:
+            crossing = distance > self.exit_cm
+        else:
+            crossing = distance < self.enter_cm
+        if not crossing:
+            self.run = 0
+            return False
+        self.run += 1
+        if self.run < self.hold:
+            return False
+        self.run = 0
+        self.present = not self.present
+        if self.present:
+            self.arrivals += 1
+        return self.present
@@ -0,0 +1,110 @@
+from array import array
+from machine import Pin, disable_irq, enable_irq, idle
+from utime import ticks_add, ticks_diff, ticks_ms, ticks_us
+
+class EdgeInput:
+
+    # Debounced digital input driven by pin interrupts, for a button, IR
+    # obstacle sensor or PIR.
+    #
+    # A hard IRQ handler timestamps every accepted change of level into a
+    # small preallocated ring of events, so nothing has to poll the pin.
+    # The main loop takes them with get(), or sleeps in wait(), which stops
+    # the core with machine.idle() until the next interrupt, so a loop with
+    # nothing to do costs neither CPU time nor pin writes.
+    #
+    # Debouncing works by lockout: once an edge is accepted, edges in the
+    # next debounce_ms are ignored. If contact bounce leaves the pin at a
+    # different level from the one last reported, get() reports that level
+    # once the lockout is over. Events that arrive while the ring is full
+    # are counted in dropped.
+    #
+    # Wake-up latency, from an edge to get() handing it out, is kept in
+    # worst_us and total_us over the `events` delivered.
+
+    def __init__(self, pin, debounce_ms=20, size=8):
+        self.pin = pin
+        self.debounce_us = debounce_ms * 1000
+        self.size = size
+        self.times = array('i', [0] * size)
+        self.levels = bytearray(size)
+        self.head = 0           # next slot the IRQ writes
+        self.tail = 0           # next slot get() reads
+        self.level = pin.value()
+        self.edge_us = ticks_add(ticks_us(), -self.debounce_us)
+        self.bounced = False
+        self.dropped = 0
+        self.events = 0
+        self.worst_us = 0
+        self.total_us = 0
+        pin.irq(self._edge, Pin.IRQ_RISING | Pin.IRQ_FALLING, hard=True)
+
+    def _edge(self, pin):
+        now = ticks_us()
+        if ticks_diff(now, self.edge_us) < self.debounce_us:
+            self.bounced = True
+            return
+        level = pin.value()
+        if level != self.level:
+            self.edge_us = now
+            self._post(now, level)
+
+    def _post(self, t, level):
+        head = self.head
+        nxt = (head + 1) % self.size
+        if nxt == self.tail:
+            self.dropped += 1
+            return
+        self.times[head] = t
+        self.levels[head] = level
+        self.level = level
+        self.head = nxt
+
+    def value(self):
+        # The debounced level.
+        return self.level
+
+    def get(self):
+        # Returns the next level change as (level, ticks_us timestamp), or
+        # None if there is none.
+        if self.bounced:
+            irq = disable_irq()
+            now = ticks_us()
+            if ticks_diff(now, self.edge_us) >= self.debounce_us:
+                self.bounced = False
+                level = self.pin.value()
+                if level != self.level:
+                    self.edge_us = now
+                    self._post(now, level)
+            enable_irq(irq)
+        tail = self.tail
+        if tail == self.head:
+            return None
+        t = self.times[tail]
+        level = self.levels[tail]
+        self.tail = (tail + 1) % self.size
+        late = ticks_diff(ticks_us(), t)
+        self.events += 1
+        self.total_us += late
+        if late > self.worst_us:
+            self.worst_us = late
+        return level, t
+
+    def wait(self, timeout_ms=None):
+        # Sleeps until the next level change and returns it as get() does,
+        # or returns None after timeout_ms. Other interrupts, such as
+        # timers, wake the core briefly along the way.
+        if timeout_ms is not None:
+            deadline = ticks_add(ticks_ms(), timeout_ms)
+        while True:
+            event = self.get()
+            if event is not None:
+                return event
+            if timeout_ms is not None and ticks_diff(deadline, ticks_ms()) <= 0:
+                return None
+            idle()
+
+    def mean_latency_us(self):
+        if not self.events:
+            return 0
+        return self.total_us // self.events
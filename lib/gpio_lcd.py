@@ -0,0 +1,287 @@
+"""Implements a HD44780 character LCD connected via ESP32 GPIO pins."""
+
+from array import array
+from machine import Pin, mem32
+from utime import sleep_ms, sleep_us, ticks_diff, ticks_us
+
+from lcd_api import LcdApi
+
+SIO_GPIO_OUT_XOR = 0xd000001c   # RP2040: toggle GPIO outputs by mask
+
+
+def gpio_number(pin):
+    """Returns the GPIO number of a machine.Pin. The rp2 port has no
+    accessor for it, but prints pins as Pin(GPIO16, ...), or Pin(16, ...)
+    on older firmware.
+    """
+    name = repr(pin)[4:].split(',')[0].rstrip(')')
+    if name.startswith('GPIO'):
+        name = name[4:]
+    try:
+        return int(name)
+    except ValueError:
+        raise ValueError('%s is not a GPIO' % repr(pin))
+
+
+class GpioLcd(LcdApi):
+    """Implements a HD44780 character LCD connected via ESP32 GPIO pins."""
+
+    def __init__(self, rs_pin, enable_pin, d0_pin=None, d1_pin=None,
+                 d2_pin=None, d3_pin=None, d4_pin=None, d5_pin=None,
+                 d6_pin=None, d7_pin=None, rw_pin=None, backlight_pin=None,
+                 num_lines=2, num_columns=16, busy_poll=False,
+                 fast_port=False):
+        """Constructs the GpioLcd object. All of the arguments must be machine.Pin
+        objects which describe which pin the given line from the LCD is
+        connected to.
+        When used in 4-bit mode, only D4, D5, D6, and D7 are physically
+        connected to the LCD panel. This function allows you call it like
+        GpioLcd(rs, enable, D4, D5, D6, D7) and it will interpret that as
+        if you had actually called:
+        GpioLcd(rs, enable, d4=D4, d5=D5, d6=D6, d7=D7)
+        The enable 8-bit mode, you need pass d0 through d7.
+        In 8-bit mode each byte is written with a single enable pulse, and
+        only the data lines that change are touched. On an RP2040,
+        fast_port=True writes all eight lines at once through the SIO
+        output register, using a table of port masks built here from the
+        GPIO numbers of the D0 through D7 pins.
+        The rw pin is only used with busy_poll=True, otherwise if you
+        specify it, then it will be set low.
+        With busy_poll=True and the rw pin wired, the LCD's busy flag is
+        read before each write instead of sleeping for the worst case
+        execution time after it. The data lines are read back, so a 5V
+        panel needs level shifting on D4-D7 (D0-D7 in 8-bit mode).
+        busy_waits, busy_timeouts and busy_saved_us count the polls, the
+        polls that ran into the worst case time, and the microseconds saved
+        compared with the delays the driver sleeps without busy_poll.
+        """
+        self.rs_pin = rs_pin
+        self.enable_pin = enable_pin
+        self.rw_pin = rw_pin
+        self.backlight_pin = backlight_pin
+        self.busy_poll = False
+        self.busy_worst_us = 0
+        self.busy_fixed_us = 0
+        self.busy_waits = 0
+        self.busy_timeouts = 0
+        self.busy_saved_us = 0
+        self._4bit = True
+        if d4_pin and d5_pin and d6_pin and d7_pin:
+            self.d0_pin = d0_pin
+            self.d1_pin = d1_pin
+            self.d2_pin = d2_pin
+            self.d3_pin = d3_pin
+            self.d4_pin = d4_pin
+            self.d5_pin = d5_pin
+            self.d6_pin = d6_pin
+            self.d7_pin = d7_pin
+            if self.d0_pin and self.d1_pin and self.d2_pin and self.d3_pin:
+                self._4bit = False
+        else:
+            # This is really 4-bit mode, and the 4 data pins were just
+            # passed as the first 4 arguments, so we switch things around.
+            self.d0_pin = None
+            self.d1_pin = None
+            self.d2_pin = None
+            self.d3_pin = None
+            self.d4_pin = d0_pin
+            self.d5_pin = d1_pin
+            self.d6_pin = d2_pin
+            self.d7_pin = d3_pin
+        self.rs_pin.init(Pin.OUT)
+        self.rs_pin.value(0)
+        if self.rw_pin:
+            self.rw_pin.init(Pin.OUT)
+            self.rw_pin.value(0)
+        self.enable_pin.init(Pin.OUT)
+        self.enable_pin.value(0)
+        self.d4_pin.init(Pin.OUT)
+        self.d5_pin.init(Pin.OUT)
+        self.d6_pin.init(Pin.OUT)
+        self.d7_pin.init(Pin.OUT)
+        self.d4_pin.value(0)
+        self.d5_pin.value(0)
+        self.d6_pin.value(0)
+        self.d7_pin.value(0)
+        if not self._4bit:
+            self.d0_pin.init(Pin.OUT)
+            self.d1_pin.init(Pin.OUT)
+            self.d2_pin.init(Pin.OUT)
+            self.d3_pin.init(Pin.OUT)
+            self.d0_pin.value(0)
+            self.d1_pin.value(0)
+            self.d2_pin.value(0)
+            self.d3_pin.value(0)
+        if self.backlight_pin is not None:
+            self.backlight_pin.init(Pin.OUT)
+            self.backlight_pin.value(0)
+        if self._4bit:
+            self.data_pins = (self.d4_pin, self.d5_pin, self.d6_pin,
+                              self.d7_pin)
+        else:
+            self.data_pins = (self.d0_pin, self.d1_pin, self.d2_pin,
+                              self.d3_pin, self.d4_pin, self.d5_pin,
+                              self.d6_pin, self.d7_pin)
+        self.last_byte = 0      # What the data lines are set to
+        self.port_masks = None
+        if fast_port and not self._4bit:
+            gpios = [gpio_number(pin) for pin in self.data_pins]
+            self.port_masks = array('I', [0] * 256)
+            for value in range(256):
+                mask = 0
+                for bit in range(8):
+                    if value & (1 << bit):
+                        mask |= 1 << gpios[bit]
+                self.port_masks[value] = mask
+
+        # See about splitting this into begin
+
+        sleep_ms(20)   # Allow LCD time to powerup
+        # Send reset 3 times
+        self.hal_write_init_nibble(self.LCD_FUNCTION_RESET)
+        sleep_ms(5)    # need to delay at least 4.1 msec
+        self.hal_write_init_nibble(self.LCD_FUNCTION_RESET)
+        sleep_ms(1)
+        self.hal_write_init_nibble(self.LCD_FUNCTION_RESET)
+        sleep_ms(1)
+        cmd = self.LCD_FUNCTION
+        if not self._4bit:
+            cmd |= self.LCD_FUNCTION_8BIT
+        self.hal_write_init_nibble(cmd)
+        sleep_ms(1)
+        LcdApi.__init__(self, num_lines, num_columns)
+        if num_lines > 1:
+            cmd |= self.LCD_FUNCTION_2LINES
+        self.hal_write_command(cmd)
+        if busy_poll and self.rw_pin:
+            # The busy flag can't be checked during initialization.
+            self.busy_poll = True
+
+    def hal_pulse_enable(self):
+        """Pulse the enable line high, and then low again."""
+        self.enable_pin.value(0)
+        sleep_us(1)
+        self.enable_pin.value(1)
+        sleep_us(1)       # Enable pulse needs to be > 450 nsec
+        self.enable_pin.value(0)
+        if not self.busy_poll:
+            sleep_us(100)     # Commands need > 37us to settle
+
+    def hal_wait_ready(self):
+        """Waits until the LCD has executed the previous instruction, by
+        reading the busy flag until it clears. Gives up once the worst case
+        execution time of that instruction has passed.
+        """
+        worst_us = self.busy_worst_us
+        if not worst_us:
+            return
+        start = ticks_us()
+        for pin in self.data_pins:
+            pin.init(Pin.IN)
+        self.rs_pin.value(0)
+        self.rw_pin.value(1)
+        while True:
+            self.enable_pin.value(1)
+            sleep_us(1)
+            busy = self.d7_pin.value()
+            self.enable_pin.value(0)
+            if self._4bit:
+                # Clock out the low nibble of the address counter as well.
+                sleep_us(1)
+                self.enable_pin.value(1)
+                sleep_us(1)
+                self.enable_pin.value(0)
+            waited = ticks_diff(ticks_us(), start)
+            if not busy:
+                break
+            if waited >= worst_us:
+                self.busy_timeouts += 1
+                break
+        self.rw_pin.value(0)
+        for pin in self.data_pins:
+            pin.init(Pin.OUT)
+        self.busy_worst_us = 0
+        self.busy_waits += 1
+        if waited < self.busy_fixed_us:
+            self.busy_saved_us += self.busy_fixed_us - waited
+
+    def hal_write_init_nibble(self, nibble):
+        """Writes an initialization nibble to the LCD.
+        This particular function is only used during initialization.
+        """
+        if self._4bit:
+            self.hal_write_4bits(nibble >> 4)
+        else:
+            self.hal_write_8bits(nibble)
+
+    def hal_backlight_on(self):
+        """Allows the hal layer to turn the backlight on."""
+        if self.backlight_pin:
+            self.backlight_pin.value(1)
+
+    def hal_backlight_off(self):
+        """Allows the hal layer to turn the backlight off."""
+        if self.backlight_pin:
+            self.backlight_pin.value(0)
+
+    def hal_write_command(self, cmd):
+        """Writes a command to the LCD.
+        Data is latched on the falling edge of E.
+        """
+        if self.busy_poll:
+            self.hal_wait_ready()
+        self.rs_pin.value(0)
+        self.hal_write_8bits(cmd)
+        if cmd <= 3:
+            # The home and clear commands require a worst
+            # case delay of 4.1 msec
+            if self.busy_poll:
+                self.busy_worst_us = 5000
+                self.busy_fixed_us = self.hal_fixed_delay_us() + 5000
+            else:
+                sleep_ms(5)
+        elif self.busy_poll:
+            self.busy_worst_us = 100
+            self.busy_fixed_us = self.hal_fixed_delay_us()
+
+    def hal_write_data(self, data):
+        """Write data to the LCD."""
+        if self.busy_poll:
+            self.hal_wait_ready()
+        self.rs_pin.value(1)
+        self.hal_write_8bits(data)
+        if self.busy_poll:
+            self.busy_worst_us = 100
+            self.busy_fixed_us = self.hal_fixed_delay_us()
+
+    def hal_fixed_delay_us(self):
+        """Returns how long hal_pulse_enable() sleeps after a byte without
+        busy_poll: 100 usec per enable pulse, two of them in 4-bit mode.
+        """
+        return 200 if self._4bit else 100
+
+    def hal_write_8bits(self, value):
+        """Writes 8 bits of data to the LCD."""
+        if self._4bit:
+            self.hal_write_4bits(value >> 4)
+            self.hal_write_4bits(value)
+            return
+        diff = value ^ self.last_byte
+        if diff:
+            self.last_byte = value
+            if self.port_masks:
+                mem32[SIO_GPIO_OUT_XOR] = self.port_masks[diff]
+            else:
+                pins = self.data_pins
+                for bit in range(8):
+                    if diff & (1 << bit):
+                        pins[bit].value((value >> bit) & 1)
+        self.hal_pulse_enable()
+
+    def hal_write_4bits(self, nibble):
+        """Writes 4 bits of data to the LCD."""
+        self.d7_pin.value(nibble & 0x08)
+        self.d6_pin.value(nibble & 0x04)
+        self.d5_pin.value(nibble & 0x02)
+        self.d4_pin.value(nibble & 0x01)
+        self.hal_pulse_enable()
@@ -0,0 +1,114 @@
+import micropython
+from machine import Pin, idle
+from utime import sleep_us, ticks_add, ticks_diff, ticks_us
+
+# Ranging states
+IDLE    = 0     # no ping in flight
+WAITING = 1     # trigger sent, echo not started yet
+ECHO    = 2     # echo line high
+DONE    = 3     # echo received, distance available
+TIMEOUT = 4     # nothing came back within timeout_us
+
+class HCSR04:
+
+    # HC-SR04 ultrasonic ranger, timed with pin interrupts.
+    #
+    # ping() fires the trigger and returns straight away. The rising and
+    # falling edges of the echo line are timestamped in a hard IRQ handler,
+    # so the core is free until the result is wanted and the timing doesn't
+    # depend on how busy the main loop is. poll() reports the state and
+    # turns a ping that has been outstanding for longer than timeout_us into
+    # TIMEOUT; distance_cm() converts the echo once it is DONE.
+    #
+    # The default timeout of 25 msec covers the sensor's 4 m range. If
+    # callback is given, it is called with the distance (soft, via
+    # micropython.schedule) as soon as the echo ends.
+
+    CM_PER_US = 0.0343 / 2  # speed of sound, there and back
+    SETTLE_US = 200         # quiet time the sensor needs after an echo
+
+    def __init__(self, trigger_pin, echo_pin, timeout_us=25000, callback=None):
+        self.trigger = trigger_pin
+        self.echo = echo_pin
+        self.timeout_us = timeout_us
+        self.callback = callback
+        self.state = IDLE
+        self.sent_us = 0
+        self.rise_us = 0
+        self.fall_us = 0
+        self.quiet_us = ticks_add(ticks_us(), -self.SETTLE_US)
+        self.pings = 0
+        self.timeouts = 0
+        # Bound methods allocate, which a hard IRQ handler can't do.
+        self._report_ref = self._report
+        trigger_pin.init(Pin.OUT, value=0)
+        echo_pin.init(Pin.IN)
+        echo_pin.irq(self._edge, Pin.IRQ_RISING | Pin.IRQ_FALLING, hard=True)
+
+    def _edge(self, pin):
+        now = ticks_us()
+        if pin.value():
+            if self.state == WAITING:
+                self.rise_us = now
+                self.state = ECHO
+            return
+        self.quiet_us = now
+        if self.state == ECHO:
+            self.fall_us = now
+            self.state = DONE
+            if self.callback is not None:
+                micropython.schedule(self._report_ref, 0)
+
+    def _report(self, _):
+        self.callback(self.distance_cm())
+
+    def ping(self):
+        # Starts a measurement. Returns False, without triggering, if the
+        # sensor is still busy with the previous echo.
+        if (self.state == WAITING or self.state == ECHO or self.echo.value()
+                or ticks_diff(ticks_us(), self.quiet_us) < self.SETTLE_US):
+            return False
+        self.state = WAITING
+        self.pings += 1
+        self.trigger.on()
+        sleep_us(10)
+        self.trigger.off()
+        self.sent_us = ticks_us()
+        return True
+
+    def poll(self):
+        # Returns the ranging state, expiring a ping that has timed out.
+        state = self.state
+        if (state == WAITING or state == ECHO) and ticks_diff(
+                ticks_us(), self.sent_us) > self.timeout_us:
+            self.state = state = TIMEOUT
+            self.timeouts += 1
+        return state
+
+    def echo_us(self):
+        # Width of the last echo pulse, or None if there isn't one.
+        if self.state != DONE:
+            return None
+        return ticks_diff(self.fall_us, self.rise_us)
+
+    def distance_cm(self):
+        # Distance measured by the last ping, or None if it timed out or
+        # hasn't finished.
+        if self.state != DONE:
+            return None
+        return ticks_diff(self.fall_us, self.rise_us) * self.CM_PER_US
+
+    def read(self):
+        # Pings and waits for the result, idling the core in between.
+        # Returns the distance in cm, or None if nothing came back.
+        start = ticks_us()
+        while not self.ping():
+            # Still busy: a ping in flight, or the echo of one that timed
+            # out hasn't ended yet.
+            self.poll()
+            if ticks_diff(ticks_us(), start) > 2 * self.timeout_us:
+                return None
+            idle()
+        while self.poll() in (WAITING, ECHO):
+            idle()
+        return self.distance_cm()
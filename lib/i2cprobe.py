@@ -0,0 +1,186 @@
+import json
+from machine import I2C, Pin
+from utime import ticks_diff, ticks_us
+
+# The (controller, SDA, SCL) wiring of this project's I2C bus.
+BUS_PINS = ((0, 0, 1),)
+
+# Every (controller, SDA, SCL) wiring of the RP2040's two I2C controllers.
+# Probing these turns each pin into an input, so only pass it to scan() on
+# a board where nothing else is using them yet.
+PAIRS = (
+    (0, 0, 1), (0, 4, 5), (0, 8, 9), (0, 12, 13), (0, 16, 17), (0, 20, 21),
+    (1, 2, 3), (1, 6, 7), (1, 10, 11), (1, 14, 15), (1, 18, 19), (1, 26, 27),
+)
+
+# Devices that can be told apart by an ID register:
+# (addresses, register, expected value, kind, description).
+FINGERPRINTS = (
+    ((0x76, 0x77), 0xd0, 0x60, 'bme280', 'BME280 pressure/humidity'),
+    ((0x76, 0x77), 0xd0, 0x58, 'bmp280', 'BMP280 pressure'),
+    ((0x77,), 0xd0, 0x55, 'bmp180', 'BMP180 pressure'),
+    ((0x68, 0x69), 0x75, 0x68, 'mpu6050', 'MPU-6050 IMU'),
+    ((0x53, 0x1d), 0x00, 0xe5, 'adxl345', 'ADXL345 accelerometer'),
+    ((0x29,), 0xc0, 0xee, 'vl53l0x', 'VL53L0X time-of-flight'),
+    ((0x1e,), 0x0a, 0x48, 'hmc5883l', 'HMC5883L compass'),
+    ((0x57,), 0xff, 0x15, 'max30102', 'MAX30102 pulse oximeter'),
+)
+
+# Best guesses for what else answers at an address.
+ADDRESSES = (
+    (0x20, 0x27, 'pcf8574', 'PCF8574 port expander'),
+    (0x38, 0x3f, 'pcf8574', 'PCF8574A port expander'),
+    (0x3c, 0x3d, 'ssd1306', 'SSD1306 OLED'),
+    (0x23, 0x23, 'bh1750', 'BH1750 light sensor'),
+    (0x40, 0x40, 'ina219', 'INA219/PCA9685/HTU21D'),
+    (0x48, 0x4b, 'ads1115', 'ADS1115 ADC/LM75'),
+    (0x50, 0x57, 'eeprom', 'AT24Cxx EEPROM'),
+    (0x68, 0x68, 'rtc', 'DS3231/DS1307 RTC'),
+)
+
+# Usual addresses of an HD44780 LCD on a PCF8574 backpack.
+LCD_BACKPACKS = (0x27, 0x3f)
+
+def lines_idle(sda, scl):
+    # True if both lines read high, as a bus with pull-ups does when idle.
+    # Pins nothing is wired to read low, or float, and aren't worth a scan.
+    return Pin(sda, Pin.IN).value() and Pin(scl, Pin.IN).value()
+
+def identify(i2c, addr):
+    # Returns (kind, description, confirmed) for the device at addr.
+    # confirmed is True if an ID register or, for a PCF8574, a port
+    # readback matched, False for a guess from the address alone.
+    for addrs, reg, expected, kind, name in FINGERPRINTS:
+        if addr in addrs:
+            try:
+                if i2c.readfrom_mem(addr, reg, 1)[0] == expected:
+                    return kind, name, True
+            except OSError:
+                pass
+    for lo, hi, kind, name in ADDRESSES:
+        if lo <= addr <= hi:
+            if kind == 'pcf8574':
+                return _pcf8574(i2c, addr, name)
+            return kind, name, False
+    return 'unknown', 'unknown device', False
+
+def _pcf8574(i2c, addr, name):
+    # A PCF8574 has no registers: a one byte read returns the port, and
+    # writing that same value back leaves the port, and so the lines it
+    # drives, as they were.
+    lcd = addr in LCD_BACKPACKS
+    if lcd:
+        kind, name = 'lcd_backpack', 'PCF8574 LCD backpack'
+    else:
+        kind = 'pcf8574'
+    try:
+        port = i2c.readfrom(addr, 1)
+        i2c.writeto(addr, port)
+        return kind, name, i2c.readfrom(addr, 1) == port
+    except OSError:
+        return kind, name, False
+
+def scan(pairs=BUS_PINS, freq=400000):
+    # Scans each (controller, SDA, SCL) wiring whose lines idle high and
+    # identifies what answers. Returns the inventory: a list of buses, each
+    # {'bus', 'sda', 'scl', 'freq', 'devices'}, devices being a list of
+    # {'addr', 'kind', 'name', 'confirmed'}. Buses with nothing on them are
+    # left out.
+    #
+    # Configures the pins it probes. The default only touches the project's
+    # I2C bus; for a sweep of every wiring pass PAIRS, before setting up
+    # any other peripheral.
+    buses = []
+    for bus, sda, scl in pairs:
+        if not lines_idle(sda, scl):
+            continue
+        i2c = I2C(bus, sda=Pin(sda), scl=Pin(scl), freq=freq)
+        found = i2c.scan()
+        if not found:
+            continue
+        devices = []
+        for addr in found:
+            kind, name, confirmed = identify(i2c, addr)
+            devices.append({'addr': addr, 'kind': kind, 'name': name,
+                            'confirmed': confirmed})
+        buses.append({'bus': bus, 'sda': sda, 'scl': scl, 'freq': freq,
+                      'devices': devices})
+    return buses
+
+def bus(entry, freq=None):
+    # The I2C object for an inventory bus entry.
+    return I2C(entry['bus'], sda=Pin(entry['sda']), scl=Pin(entry['scl']),
+               freq=freq or entry['freq'])
+
+def present(entry):
+    # True if every device of an inventory bus entry still answers: one
+    # address probe each.
+    i2c = bus(entry)
+    for device in entry['devices']:
+        try:
+            i2c.writeto(device['addr'], b'')
+        except OSError:
+            return False
+    return True
+
+def load(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save(path, buses):
+    with open(path, 'w') as f:
+        json.dump(buses, f)
+
+class Inventory:
+
+    # I2C devices on the board, cached in a JSON file.
+    #
+    # The first boot runs scan() and saves the result to path. Later boots
+    # load it and only check that each cached device still answers, which
+    # takes one address probe per device instead of a scan of every
+    # address on pairs (see scan()); if one has gone, or the cache is
+    # missing or unreadable, it scans again. elapsed_us is how long it took
+    # and cached whether the cache was used.
+
+    def __init__(self, path='i2c.json', pairs=BUS_PINS, freq=400000,
+                 rescan=False):
+        self.path = path
+        start = ticks_us()
+        buses = None if rescan else load(path)
+        self.cached = bool(buses) and all(
+            present(entry) for entry in buses)
+        if not self.cached:
+            buses = scan(pairs, freq)
+            save(path, buses)
+        self.buses = buses
+        self.elapsed_us = ticks_diff(ticks_us(), start)
+
+    def find(self, kind):
+        # (bus entry, device) of the first device of the given kind, or
+        # None.
+        for entry in self.buses:
+            for device in entry['devices']:
+                if device['kind'] == kind:
+                    return entry, device
+        return None
+
+    def i2c(self, kind):
+        # (I2C object, address) for the first device of the given kind.
+        found = self.find(kind)
+        if found is None:
+            raise OSError('no %s found' % kind)
+        return bus(found[0]), found[1]['addr']
+
+    def report(self):
+        lines = []
+        for entry in self.buses:
+            lines.append('I2C%d sda=%d scl=%d' % (
+                entry['bus'], entry['sda'], entry['scl']))
+            for device in entry['devices']:
+                lines.append('  0x%02x %s%s' % (
+                    device['addr'], device['name'],
+                    '' if device['confirmed'] else '?'))
+        return '\n'.join(lines)
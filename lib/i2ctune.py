@@ -0,0 +1,97 @@
+import json
+from machine import I2C, Pin
+
+# Candidate bus clocks, fastest first.
+FREQS = (1000000, 800000, 600000, 400000, 300000, 200000, 100000)
+
+# Test patterns written to a PCF8574 port and read back. Every line goes
+# both ways, next to neighbours going the other way.
+PATTERNS = b'\x55\xaa\x0f\xf0\x00\xff\x33\xcc'
+
+# PCF8574 lines of an LCD backpack that can safely be exercised: all but E
+# (P2), which would clock the pattern into the HD44780, and the backlight
+# (P3), which would flicker.
+LCD_LINES = 0xf3
+
+def verify(i2c, addr, lines=0xff, rounds=4):
+    # Writes each test pattern to the PCF8574 at addr and reads the port
+    # back, rounds times over. Only the bits in lines are changed; the
+    # others keep their current level. The port is restored afterwards.
+    # Returns True if every readback matched.
+    try:
+        port = i2c.readfrom(addr, 1)[0]
+    except OSError:
+        return False
+    keep = port & ~lines & 0xff
+    buf = bytearray(1)
+    ok = True
+    try:
+        for _ in range(rounds):
+            for pattern in PATTERNS:
+                buf[0] = (pattern & lines) | keep
+                i2c.writeto(addr, buf)
+                if i2c.readfrom(addr, 1)[0] != buf[0]:
+                    ok = False
+                    break
+            if not ok:
+                break
+    except OSError:
+        ok = False
+    try:
+        buf[0] = port
+        i2c.writeto(addr, buf)
+    except OSError:
+        pass
+    return ok
+
+def _key(bus, sda, scl, addr):
+    return '%d:%d:%d:0x%02x' % (bus, sda, scl, addr)
+
+def _load(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def tune(bus, sda, scl, addr, freqs=FREQS, limit=None, lines=0xff,
+         path='i2cfreq.json', retune=False):
+    # Returns an I2C object for the PCF8574 at addr on controller bus,
+    # clocked at the fastest of freqs (up to limit) at which the port
+    # reads back every pattern verify() writes, and that rate.
+    #
+    # The rate found is saved in path, per bus and address. Later calls
+    # start from the saved rate and only run one verify() at it, so a
+    # boot costs a few transfers instead of a sweep; if that fails, or
+    # retune is set, the sweep runs again. Raises OSError if the device
+    # doesn't answer at any rate.
+    key = _key(bus, sda, scl, addr)
+    saved = {} if retune else _load(path)
+    freq = saved.get(key)
+    if freq is not None and (limit is None or freq <= limit):
+        i2c = I2C(bus, sda=Pin(sda), scl=Pin(scl), freq=freq)
+        if verify(i2c, addr, lines, rounds=1):
+            return i2c, freq
+    for freq in freqs:
+        if limit is not None and freq > limit:
+            continue
+        i2c = I2C(bus, sda=Pin(sda), scl=Pin(scl), freq=freq)
+        if verify(i2c, addr, lines):
+            saved = _load(path)
+            saved[key] = freq
+            with open(path, 'w') as f:
+                json.dump(saved, f)
+            return i2c, freq
+    raise OSError('no working I2C rate for 0x%02x' % addr)
+
+def lcd_bus(bus, sda, scl, addr, path='i2cfreq.json', retune=False):
+    # tune() for an HD44780 on a PCF8574 backpack: only the lines that
+    # don't disturb the display are tested, and only rates up to what the
+    # LCD's own timing allows (see I2cLcd.MAX_FREQ) are tried, so this
+    # finds the backpacks that can't keep up with it. A rate that fails
+    # may still have clocked garbage into the HD44780, so call this before
+    # creating the I2cLcd, whose reset sequence sets the controller right.
+    from pico_i2c_lcd import I2cLcd
+    freqs = [f for f in FREQS if f <= I2cLcd.MAX_FREQ]
+    return tune(bus, sda, scl, addr, freqs, lines=LCD_LINES, path=path,
+                retune=retune)
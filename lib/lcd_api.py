@@ -0,0 +1,370 @@
+import time
+
+class LcdApi:
+    
+    # Implements the API for talking with HD44780 compatible character LCDs.
+    # This class only knows what commands to send to the LCD, and not how to get
+    # them to the LCD.
+    #
+    # It is expected that a derived class will implement the hal_xxx functions.
+    #
+    # The following constant names were lifted from the avrlib lcd.h header file,
+    # with bit numbers changed to bit masks.
+    
+    # HD44780 LCD controller command set
+    LCD_CLR             = 0x01  # DB0: clear display
+    LCD_HOME            = 0x02  # DB1: return to home position
+
+    LCD_ENTRY_MODE      = 0x04  # DB2: set entry mode
+    LCD_ENTRY_INC       = 0x02  # DB1: increment
+    LCD_ENTRY_SHIFT     = 0x01  # DB0: shift
+
+    LCD_ON_CTRL         = 0x08  # DB3: turn lcd/cursor on
+    LCD_ON_DISPLAY      = 0x04  # DB2: turn display on
+    LCD_ON_CURSOR       = 0x02  # DB1: turn cursor on
+    LCD_ON_BLINK        = 0x01  # DB0: blinking cursor
+
+    LCD_MOVE            = 0x10  # DB4: move cursor/display
+    LCD_MOVE_DISP       = 0x08  # DB3: move display (0-> move cursor)
+    LCD_MOVE_RIGHT      = 0x04  # DB2: move right (0-> left)
+
+    LCD_FUNCTION        = 0x20  # DB5: function set
+    LCD_FUNCTION_8BIT   = 0x10  # DB4: set 8BIT mode (0->4BIT mode)
+    LCD_FUNCTION_2LINES = 0x08  # DB3: two lines (0->one line)
+    LCD_FUNCTION_10DOTS = 0x04  # DB2: 5x10 font (0->5x7 font)
+    LCD_FUNCTION_RESET  = 0x30  # See "Initializing by Instruction" section
+
+    LCD_CGRAM           = 0x40  # DB6: set CG RAM address
+    LCD_DDRAM           = 0x80  # DB7: set DD RAM address
+
+    LCD_RS_CMD          = 0
+    LCD_RS_DATA         = 1
+
+    LCD_RW_WRITE        = 0
+    LCD_RW_READ         = 1
+
+    # In framebuffer mode, flush() resends up to this many unchanged cells
+    # between two changed ones rather than issuing another DDRAM address.
+    FB_MAX_GAP          = 1
+
+    def __init__(self, num_lines, num_columns):
+        self.num_lines = num_lines
+        if self.num_lines > 4:
+            self.num_lines = 4
+        self.num_columns = num_columns
+        if self.num_columns > 40:
+            self.num_columns = 40
+        self.cursor_x = 0
+        self.cursor_y = 0
+        self.implied_newline = False
+        self.backlight = True
+        self.fb = None
+        self.shadow = None
+        self.glyph_slots = [None] * 8    # Bitmap held by each CGRAM slot
+        self.glyph_lru = list(range(8))  # Least recently used first
+        self.glyph_names = {}
+        self.display_off()
+        self.backlight_on()
+        self.clear()
+        self.hal_write_command(self.LCD_ENTRY_MODE | self.LCD_ENTRY_INC)
+        self.hide_cursor()
+        self.display_on()
+
+    def clear(self):
+        # Clears the LCD display and moves the cursor to the top left corner
+        if self.fb is not None:
+            for i in range(len(self.fb)):
+                self.fb[i] = 0x20
+            self.cursor_x = 0
+            self.cursor_y = 0
+            return
+        self.hal_write_command(self.LCD_CLR)
+        self.hal_write_command(self.LCD_HOME)
+        self.cursor_x = 0
+        self.cursor_y = 0
+
+    def show_cursor(self):
+        # Causes the cursor to be made visible
+        self.hal_write_command(self.LCD_ON_CTRL | self.LCD_ON_DISPLAY |
+                               self.LCD_ON_CURSOR)
+
+    def hide_cursor(self):
+        # Causes the cursor to be hidden
+        self.hal_write_command(self.LCD_ON_CTRL | self.LCD_ON_DISPLAY)
+
+    def blink_cursor_on(self):
+        # Turns on the cursor, and makes it blink
+        self.hal_write_command(self.LCD_ON_CTRL | self.LCD_ON_DISPLAY |
+                               self.LCD_ON_CURSOR | self.LCD_ON_BLINK)
+
+    def blink_cursor_off(self):
+        # Turns on the cursor, and makes it no blink (i.e. be solid)
+        self.hal_write_command(self.LCD_ON_CTRL | self.LCD_ON_DISPLAY |
+                               self.LCD_ON_CURSOR)
+
+    def display_on(self):
+        # Turns on (i.e. unblanks) the LCD
+        self.hal_write_command(self.LCD_ON_CTRL | self.LCD_ON_DISPLAY)
+
+    def display_off(self):
+        # Turns off (i.e. blanks) the LCD
+        self.hal_write_command(self.LCD_ON_CTRL)
+
+    def backlight_on(self):
+        # Turns the backlight on.
+        
+        # This isn't really an LCD command, but some modules have backlight
+        # controls, so this allows the hal to pass through the command.
+        self.backlight = True
+        self.hal_backlight_on()
+
+    def backlight_off(self):
+        # Turns the backlight off.
+
+        # This isn't really an LCD command, but some modules have backlight
+        # controls, so this allows the hal to pass through the command.
+        self.backlight = False
+        self.hal_backlight_off()
+
+    def move_to(self, cursor_x, cursor_y):
+        # Moves the cursor position to the indicated position. The cursor
+        # position is zero based (i.e. cursor_x == 0 indicates first column).
+        self.cursor_x = cursor_x
+        self.cursor_y = cursor_y
+        if self.fb is not None:
+            return
+        addr = cursor_x & 0x3f
+        if cursor_y & 1:
+            addr += 0x40    # Lines 1 & 3 add 0x40
+        if cursor_y & 2:    # Lines 2 & 3 add number of columns
+            addr += self.num_columns
+        self.hal_write_command(self.LCD_DDRAM | addr)
+
+    def putchar(self, char):
+        # Writes the indicated character to the LCD at the current cursor
+        # position, and advances the cursor by one position. The controller
+        # advances its own address, so the cursor is only repositioned after
+        # a wraparound or a newline.
+        if char == '\n':
+            if self.implied_newline:
+                # self.implied_newline means we advanced due to a wraparound,
+                # so if we get a newline right after that we ignore it.
+                pass
+            else:
+                self.cursor_x = self.num_columns
+        else:
+            if self.fb is None:
+                self.hal_write_data(ord(char))
+            elif (self.cursor_x < self.num_columns and
+                  self.cursor_y < self.num_lines):
+                self.fb[self.cursor_y * self.num_columns +
+                        self.cursor_x] = ord(char)
+            self.cursor_x += 1
+        moved = False
+        if self.cursor_x >= self.num_columns:
+            self.cursor_x = 0
+            self.cursor_y += 1
+            self.implied_newline = (char != '\n')
+            moved = True
+        if self.cursor_y >= self.num_lines:
+            self.cursor_y = 0
+            moved = True
+        if moved:
+            self.move_to(self.cursor_x, self.cursor_y)
+
+    def putstr(self, string):
+        # Write the indicated string to the LCD at the current cursor
+        # position and advances the cursor position appropriately.
+        #
+        # The characters that fit on the current line are sent as one run
+        # through hal_write_run, relying on the controller's address
+        # auto-increment, so the cursor is only repositioned after a
+        # wraparound or a newline.
+        if self.fb is not None:
+            for char in string:
+                self.putchar(char)
+            return
+        start = 0
+        end = len(string)
+        while start < end:
+            if string[start] == '\n':
+                if not self.implied_newline:
+                    self.cursor_x = self.num_columns
+                stop = start + 1
+                newline = True
+            else:
+                stop = start + 1
+                if self.cursor_y < self.num_lines:
+                    stop = max(start + self.num_columns - self.cursor_x, stop)
+                stop = min(stop, end)
+                nl = string.find('\n', start, stop)
+                if nl >= 0:
+                    stop = nl
+                self.hal_write_run(None, string, start, stop)
+                self.cursor_x += stop - start
+                newline = False
+            start = stop
+            moved = False
+            if self.cursor_x >= self.num_columns:
+                self.cursor_x = 0
+                self.cursor_y += 1
+                self.implied_newline = not newline
+                moved = True
+            if self.cursor_y >= self.num_lines:
+                self.cursor_y = 0
+                moved = True
+            if moved:
+                self.move_to(self.cursor_x, self.cursor_y)
+
+    def framebuffer_on(self):
+        # Switches to framebuffer mode. clear, move_to, putchar and putstr
+        # then only draw into a copy of the display kept in RAM, and nothing
+        # is sent to the LCD until flush() is called.
+        if self.fb is None:
+            self.clear()
+            self.fb = bytearray(b' ' * (self.num_lines * self.num_columns))
+            self.shadow = bytearray(self.fb)    # What the LCD is showing
+
+    def framebuffer_off(self):
+        # Flushes the framebuffer and goes back to writing straight through
+        # to the LCD.
+        if self.fb is not None:
+            self.flush()
+            self.fb = None
+            self.shadow = None
+            self.move_to(self.cursor_x, self.cursor_y)
+
+    def flush(self):
+        # Sends the framebuffer cells that differ from what the LCD is
+        # showing. Each changed run costs a single DDRAM address command,
+        # sent together with the run's characters.
+        # The hardware cursor is left after the last run that was sent.
+        fb = self.fb
+        shadow = self.shadow
+        if fb is None:
+            return
+        for cursor_y in range(self.num_lines):
+            base = cursor_y * self.num_columns
+            x = 0
+            while x < self.num_columns:
+                if fb[base + x] == shadow[base + x]:
+                    x += 1
+                    continue
+                start = x
+                end = x + 1
+                x = end
+                while x < self.num_columns and x - end <= self.FB_MAX_GAP:
+                    if fb[base + x] != shadow[base + x]:
+                        end = x + 1
+                    x += 1
+                addr = start & 0x3f
+                if cursor_y & 1:
+                    addr += 0x40    # Lines 1 & 3 add 0x40
+                if cursor_y & 2:    # Lines 2 & 3 add number of columns
+                    addr += self.num_columns
+                self.hal_write_run(self.LCD_DDRAM | addr, fb,
+                                   base + start, base + end)
+                for i in range(base + start, base + end):
+                    shadow[i] = fb[i]
+
+    def custom_char(self, location, charmap):
+        # Write a character to one of the 8 CGRAM locations, available
+        # as chr(0) through chr(7). Nothing is sent if the location already
+        # holds this bitmap.
+        location &= 0x7
+        charmap = bytes(charmap[:8])
+        if self.glyph_slots[location] != charmap:
+            self.glyph_slots[location] = charmap
+            self.hal_write_run(self.LCD_CGRAM | (location << 3), charmap, 0, 8)
+            self.move_to(self.cursor_x, self.cursor_y)
+        self.glyph_lru.remove(location)
+        self.glyph_lru.append(location)
+
+    def define_glyph(self, name, charmap):
+        # Registers an 8 byte character bitmap under a name, for use with
+        # glyph() and load_glyphs().
+        self.glyph_names[name] = bytes(charmap[:8])
+
+    def glyph(self, key):
+        # Returns the character that shows a glyph, given by name or as an
+        # 8 byte bitmap. See load_glyphs().
+        return self.load_glyphs((key,))
+
+    def load_glyphs(self, keys):
+        # Makes sure every glyph in keys (names or 8 byte bitmaps) is held
+        # in one of the 8 CGRAM locations, and returns a string with the
+        # character for each of them.
+        #
+        # Glyphs that are already loaded cost nothing. The others replace the
+        # least recently used ones and are uploaded together, in one
+        # transfer per run of adjacent locations. Note that characters on
+        # the display showing a replaced glyph change along with it.
+        bitmaps = []
+        for key in keys:
+            if isinstance(key, str):
+                bitmaps.append(self.glyph_names[key])
+            else:
+                bitmaps.append(bytes(key[:8]))
+        if len(set(bitmaps)) > 8:
+            raise ValueError('more than 8 glyphs')
+        loaded = []
+        chars = ''
+        for bitmap in bitmaps:
+            if bitmap in self.glyph_slots:
+                location = self.glyph_slots.index(bitmap)
+            else:
+                location = self.glyph_lru[0]
+                self.glyph_slots[location] = bitmap
+                loaded.append(location)
+            self.glyph_lru.remove(location)
+            self.glyph_lru.append(location)
+            chars += chr(location)
+        loaded.sort()
+        i = 0
+        while i < len(loaded):
+            j = i + 1
+            while j < len(loaded) and loaded[j] == loaded[j - 1] + 1:
+                j += 1
+            data = b''.join([self.glyph_slots[k] for k in loaded[i:j]])
+            self.hal_write_run(self.LCD_CGRAM | (loaded[i] << 3), data,
+                               0, len(data))
+            i = j
+        if loaded:
+            self.move_to(self.cursor_x, self.cursor_y)
+        return chars
+
+    def hal_backlight_on(self):
+        # Allows the hal layer to turn the backlight on.
+        # If desired, a derived HAL class will implement this function.
+        pass
+
+    def hal_backlight_off(self):
+        # Allows the hal layer to turn the backlight off.
+        # If desired, a derived HAL class will implement this function.
+        pass
+
+    def hal_write_command(self, cmd):
+        # Write a command to the LCD.
+        # It is expected that a derived HAL class will implement this function.
+        raise NotImplementedError
+
+    def hal_write_data(self, data):
+        # Write data to the LCD.
+        # It is expected that a derived HAL class will implement this function.
+        raise NotImplementedError
+
+    def hal_write_run(self, cmd, data, start, end):
+        # Write an optional command followed by the characters data[start:end]
+        # to the LCD. data may be a str or a bytes-like object. cmd must not
+        # be a clear or home command, and None means no command.
+        # A derived HAL class may implement this function to send the whole
+        # run in one bus transaction.
+        if cmd is not None:
+            self.hal_write_command(cmd)
+        text = isinstance(data, str)
+        for i in range(start, end):
+            self.hal_write_data(ord(data[i]) if text else data[i])
+
+    def hal_sleep_us(self, usecs):
+        # Sleep for some time (given in microseconds)
+        time.sleep_us(usecs)
@@ -0,0 +1,22 @@
+# Freezes the shared modules into a MicroPython firmware image, so they run
+# as bytecode straight from flash instead of being compiled into the heap
+# at boot. Include it from a board manifest:
+#
+#   include("$(PORT_DIR)/boards/manifest.py")
+#   include("/path/to/micropython_project/lib/manifest.py")
+
+module("lcd_api.py")
+module("pico_i2c_lcd.py")
+module("gpio_lcd.py")
+module("hcsr04.py")
+module("ranging.py")
+module("distfilter.py")
+module("dht_sampler.py")
+module("timeseries.py")
+module("sensorlog.py")
+module("runtime.py")
+module("servo_planner.py")
+module("edgeinput.py")
+module("traffic.py")
+module("i2cprobe.py")
+module("i2ctune.py")
@@ -0,0 +1,154 @@
+import utime
+import gc
+
+from lcd_api import LcdApi
+
+# PCF8574 pin definitions
+MASK_RS = 0x01       # P0
+MASK_RW = 0x02       # P1
+MASK_E  = 0x04       # P2
+
+SHIFT_BACKLIGHT = 3  # P3
+SHIFT_DATA      = 4  # P4-P7
+
+class I2cLcd(LcdApi):
+    
+    #Implements a HD44780 character LCD connected via PCF8574 on I2C
+
+    # Fastest I2C clock the LCD keeps up with. Bytes are sent back to back,
+    # so the next byte's first nibble is latched two port writes (18 bit
+    # times) after the last one, and the HD44780 needs 41 usec to store a
+    # character. At 400 kHz that is 45 usec, leaving some margin for the
+    # controller's oscillator tolerance.
+    MAX_FREQ = 400000
+
+    # Longest run of LCD bytes after a command: all 8 CGRAM glyphs, which is
+    # also more than the 40 characters of the longest HD44780 line.
+    RUN_MAX = 64
+
+    def __init__(self, i2c, i2c_addr, num_lines, num_columns):
+        self.i2c = i2c
+        self.i2c_addr = i2c_addr
+        # Every LCD byte goes out as four PCF8574 port writes (high nibble
+        # with E high, then E low, then the same for the low nibble). The
+        # buffer holds a command plus RUN_MAX bytes, so a whole line or the
+        # CGRAM can be sent in one I2C transaction.
+        #
+        # All buffers and the views into them are allocated here, so that
+        # writing to the LCD never allocates from the heap and never has to
+        # wait for a garbage collection.
+        self.buf = bytearray(4 * (self.RUN_MAX + 1))
+        buf = memoryview(self.buf)
+        self.views = [buf[:4 * i] for i in range(len(self.buf) // 4 + 1)]
+        self.port_buf = bytearray(2)
+        self.port_views = (memoryview(self.port_buf)[:1], self.port_buf)
+        # Heap bytes allocated by the last flush(), where gc.mem_alloc() is
+        # available.
+        self.flush_alloc = None
+        self.hal_write_port(0)
+        utime.sleep_ms(20)   # Allow LCD time to powerup
+        # Send reset 3 times
+        self.hal_write_init_nibble(self.LCD_FUNCTION_RESET)
+        utime.sleep_ms(5)    # Need to delay at least 4.1 msec
+        self.hal_write_init_nibble(self.LCD_FUNCTION_RESET)
+        utime.sleep_ms(1)
+        self.hal_write_init_nibble(self.LCD_FUNCTION_RESET)
+        utime.sleep_ms(1)
+        # Put LCD into 4-bit mode
+        self.hal_write_init_nibble(self.LCD_FUNCTION)
+        utime.sleep_ms(1)
+        LcdApi.__init__(self, num_lines, num_columns)
+        cmd = self.LCD_FUNCTION
+        if num_lines > 1:
+            cmd |= self.LCD_FUNCTION_2LINES
+        self.hal_write_command(cmd)
+        gc.collect()
+
+    def hal_write_init_nibble(self, nibble):
+        # Writes an initialization nibble to the LCD.
+        # This particular function is only used during initialization.
+        byte = ((nibble >> 4) & 0x0f) << SHIFT_DATA
+        self.port_buf[0] = byte | MASK_E
+        self.port_buf[1] = byte
+        self.i2c.writeto(self.i2c_addr, self.port_views[1])
+
+    def hal_backlight_on(self):
+        # Allows the hal layer to turn the backlight on
+        self.hal_write_port(1 << SHIFT_BACKLIGHT)
+
+    def hal_backlight_off(self):
+        #Allows the hal layer to turn the backlight off
+        self.hal_write_port(0)
+
+    def hal_write_port(self, byte):
+        # Sets the PCF8574 outputs to byte.
+        self.port_buf[0] = byte
+        self.i2c.writeto(self.i2c_addr, self.port_views[0])
+
+    def hal_write_command(self, cmd):
+        # Write a command to the LCD. Data is latched on the falling edge of E.
+        self.encode(0, self.backlight << SHIFT_BACKLIGHT, cmd)
+        self.i2c.writeto(self.i2c_addr, self.views[1])
+        if cmd <= 3:
+            # The home and clear commands require a worst case delay of 4.1 msec
+            utime.sleep_ms(5)
+
+    def hal_write_data(self, data):
+        # Write data to the LCD. Data is latched on the falling edge of E.
+        self.encode(0, MASK_RS | (self.backlight << SHIFT_BACKLIGHT), data)
+        self.i2c.writeto(self.i2c_addr, self.views[1])
+
+    def hal_write_run(self, cmd, data, start, end):
+        # Write an optional command followed by the characters data[start:end]
+        # to the LCD, in as few I2C transactions as the buffer allows.
+        # Nothing is allocated when data is a bytes-like object, such as the
+        # framebuffer.
+        buf = self.buf
+        size = len(buf)
+        flags = MASK_RS | (self.backlight << SHIFT_BACKLIGHT)
+        text = isinstance(data, str)
+        pos = 0
+        if cmd is not None:
+            self.encode(0, self.backlight << SHIFT_BACKLIGHT, cmd)
+            pos = 4
+        for i in range(start, end):
+            if pos == size:
+                self.i2c.writeto(self.i2c_addr, buf)
+                pos = 0
+            self.encode(pos, flags, ord(data[i]) if text else data[i])
+            pos += 4
+        if pos:
+            self.i2c.writeto(self.i2c_addr, self.views[pos >> 2])
+
+    def encode(self, pos, flags, value):
+        # Encodes one LCD byte as the four port writes that strobe it in,
+        # starting at self.buf[pos]. flags holds the RS and backlight bits.
+        buf = self.buf
+        byte = flags | (((value >> 4) & 0x0f) << SHIFT_DATA)
+        buf[pos] = byte | MASK_E
+        buf[pos + 1] = byte
+        byte = flags | ((value & 0x0f) << SHIFT_DATA)
+        buf[pos + 2] = byte | MASK_E
+        buf[pos + 3] = byte
+
+    def flush(self):
+        # Flushes the framebuffer, recording in self.flush_alloc how many
+        # bytes of heap the flush allocated. This should stay at zero.
+        if not hasattr(gc, 'mem_alloc'):
+            LcdApi.flush(self)
+            return
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            before = gc.mem_alloc()
+            LcdApi.flush(self)
+            self.flush_alloc = gc.mem_alloc() - before
+        finally:
+            if enabled:
+                gc.enable()
+
+    def collect(self):
+        # Runs a garbage collection. The write path doesn't allocate, so
+        # this is only worth calling to collect the application's own
+        # garbage at a moment of its choosing, e.g. right after a flush.
+        gc.collect()
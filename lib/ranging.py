@@ -0,0 +1,115 @@
+from array import array
+from machine import Timer
+from utime import ticks_add, ticks_diff, ticks_ms, ticks_us
+
+from hcsr04 import ECHO, HCSR04, TIMEOUT, WAITING
+
+class Ranger:
+
+    # Runs any number of HCSR04 sensors (see hcsr04.py) from one
+    # non-blocking scheduler and publishes their latest readings.
+    #
+    # Sensors are fired in slots. Each entry of `groups` lists the indexes of
+    # sensors that can't hear each other (facing away, or on different
+    # doors) and so may ping at the same time; by default every sensor gets
+    # its own slot. A slot ends as soon as every echo in it is back or has
+    # timed out, so near targets make for short cycles, and the next slot
+    # fires after guard_us of quiet to let stray reflections die down. The
+    # echoes themselves are timed in the sensors' pin IRQs, so the
+    # scheduler only needs calling every millisecond or so: from the main
+    # loop with step(), or from a timer after start().
+    #
+    # A timer callback on the RP2040 is a hard IRQ, which can't allocate,
+    # and a float does. So the shared table holds integers: widths[i] (echo
+    # width in usec, or -1 when nothing is in range), stamps[i] (ticks_ms()
+    # of the reading) and fresh[i] (0 before the first reading, 1 for a
+    # reading not yet read(), 2 after). read() converts to cm. A sensor
+    # that couldn't ping in its slot keeps its last reading.
+
+    NO_ECHO = -1.0
+
+    def __init__(self, sensors, groups=None, guard_us=2000):
+        self.sensors = sensors
+        if groups is None:
+            groups = [(i,) for i in range(len(sensors))]
+        self.groups = groups
+        self.guard_us = guard_us
+        self.widths = array('i', [-1] * len(sensors))
+        self.stamps = array('i', [0] * len(sensors))
+        self.fresh = bytearray(len(sensors))
+        self.pinged = bytearray(len(sensors))   # fired in the current slot
+        self.slot = len(groups) - 1
+        self.active = False
+        self.quiet_us = ticks_add(ticks_us(), -guard_us)
+        self.samples = 0
+        self.skipped = 0
+        self.timer = None
+
+    def step(self):
+        # Collects finished echoes and fires the next slot when it's due.
+        # Returns True if new readings were published.
+        sensors = self.sensors
+        published = False
+        if self.active:
+            group = self.groups[self.slot]
+            for i in group:
+                state = sensors[i].poll()
+                if state == WAITING or state == ECHO:
+                    return False
+            now_ms = ticks_ms()
+            for i in group:
+                if not self.pinged[i]:
+                    continue
+                sensor = sensors[i]
+                if sensor.state == TIMEOUT:
+                    self.widths[i] = -1
+                else:
+                    self.widths[i] = sensor.echo_us()
+                self.stamps[i] = now_ms
+                self.fresh[i] = 1
+                self.samples += 1
+            self.active = False
+            self.quiet_us = ticks_us()
+            published = True
+        if ticks_diff(ticks_us(), self.quiet_us) < self.guard_us:
+            return published
+        self.slot = slot = (self.slot + 1) % len(self.groups)
+        fired = False
+        for i in self.groups[slot]:
+            if sensors[i].ping():
+                self.pinged[i] = 1
+                fired = True
+            else:
+                self.pinged[i] = 0
+                # Still ringing from an earlier timeout; it'll be back in
+                # its next slot.
+                self.skipped += 1
+        self.active = fired
+        if not fired:
+            self.quiet_us = ticks_us()
+        return published
+
+    def read(self, i):
+        # Returns (distance_cm, age_ms) of sensor i's latest reading. The
+        # distance is -1.0 if nothing was in range and None if the sensor
+        # hasn't reported yet.
+        if not self.fresh[i]:
+            return None, 0
+        self.fresh[i] = 2
+        width = self.widths[i]
+        distance = self.NO_ECHO if width < 0 else width * HCSR04.CM_PER_US
+        return distance, ticks_diff(ticks_ms(), self.stamps[i])
+
+    def _tick(self, timer):
+        self.step()
+
+    def start(self, period_ms=1):
+        # Runs step() from a periodic timer, in hard IRQ context.
+        self.stop()
+        self.timer = Timer(mode=Timer.PERIODIC, period=period_ms,
+                           callback=self._tick)
+
+    def stop(self):
+        if self.timer is not None:
+            self.timer.deinit()
+            self.timer = None
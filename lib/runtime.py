@@ -0,0 +1,105 @@
+import asyncio
+from utime import ticks_add, ticks_diff, ticks_ms
+
+from hcsr04 import ECHO, WAITING
+
+# Cooperative tasks for running several of the project's features on one
+# board, under asyncio. Each task only holds the core for one short step
+# (an LCD flush, a DHT read, a servo step) and sleeps in between, so every
+# task gets to run within a bounded delay of when it wants to.
+#
+# Worst lateness seen by each periodic task, in msec: how long after its
+# deadline it got to run.
+lateness = {}
+
+def _note(name, deadline):
+    late = ticks_diff(ticks_ms(), deadline)
+    if late > lateness.get(name, 0):
+        lateness[name] = late
+
+async def every(period_ms, func, *args, name='every'):
+    # Calls func(*args) every period_ms, on a fixed grid of deadlines so
+    # that the period doesn't stretch by the time func takes. Missed
+    # deadlines are skipped rather than caught up with.
+    lateness[name] = 0
+    deadline = ticks_ms()
+    while True:
+        _note(name, deadline)
+        func(*args)
+        deadline = ticks_add(deadline, period_ms)
+        wait = ticks_diff(deadline, ticks_ms())
+        if wait < 0:
+            deadline = ticks_ms()
+            wait = 0
+        await asyncio.sleep_ms(wait)
+
+async def lcd_flush(lcd, period_ms=100):
+    # Writes what was drawn into the LCD's framebuffer out to the display
+    # (see LcdApi.framebuffer_on()).
+    await every(period_ms, lcd.flush, name='lcd_flush')
+
+async def dht_read(sampler, callback):
+    # Measures a DhtSampler whenever a sample is due and calls
+    # callback(sampler) with each new reading. The read itself blocks for
+    # the DHT's bit-banged transfer: about 20 msec for a DHT11.
+    lateness['dht_read'] = 0
+    while True:
+        wait = ticks_diff(sampler.next_ms, ticks_ms())
+        if wait > 0:
+            await asyncio.sleep_ms(wait)
+        _note('dht_read', sampler.next_ms)
+        if sampler.update():
+            callback(sampler)
+
+async def ping(sonar, poll_ms=2):
+    # One HCSR04 measurement. Returns the distance in cm, or None if no
+    # echo came back. The echo is timed by the sensor's pin IRQ, so polling
+    # every couple of msec loses no accuracy.
+    start = ticks_ms()
+    while not sonar.ping():
+        sonar.poll()
+        if ticks_diff(ticks_ms(), start) > 2 * sonar.timeout_us // 1000:
+            return None
+        await asyncio.sleep_ms(poll_ms)
+    while sonar.poll() in (WAITING, ECHO):
+        await asyncio.sleep_ms(poll_ms)
+    return sonar.distance_cm()
+
+async def ranging(sonar, period_ms, callback):
+    # Pings every period_ms and calls callback(distance) with the result.
+    lateness['ranging'] = 0
+    deadline = ticks_ms()
+    while True:
+        _note('ranging', deadline)
+        callback(await ping(sonar))
+        deadline = ticks_add(deadline, period_ms)
+        await asyncio.sleep_ms(max(0, ticks_diff(deadline, ticks_ms())))
+
+async def servo_ramp(pwm, start, stop, step=50, delay_ms=30):
+    # Moves a servo from duty start to stop (duty_u16 units), one step every
+    # delay_ms.
+    for duty in range(start, stop, step if stop > start else -abs(step)):
+        pwm.duty_u16(duty)
+        await asyncio.sleep_ms(delay_ms)
+    pwm.duty_u16(stop)
+
+async def traffic_phases(pins, phases):
+    # Runs a traffic light forever. phases is a sequence of (levels,
+    # duration_ms), with one 0/1 level per pin. Phase changes keep to a
+    # fixed schedule however late the task gets to run.
+    deadline = ticks_ms()
+    lateness['traffic_phases'] = 0
+    while True:
+        for levels, duration_ms in phases:
+            _note('traffic_phases', deadline)
+            for pin, level in zip(pins, levels):
+                pin.value(level)
+            deadline = ticks_add(deadline, duration_ms)
+            await asyncio.sleep_ms(max(0, ticks_diff(deadline, ticks_ms())))
+
+async def _main(coros):
+    await asyncio.gather(*coros)
+
+def run(*coros):
+    # Runs the given task coroutines together, forever.
+    asyncio.run(_main(coros))
@@ -0,0 +1,195 @@
+import struct
+
+MAGIC = b'SLOG'
+VERSION = 2
+
+# File header: magic, version, fields per record, scale, sequence number,
+# records per block, blocks per file. Records follow it back to back, so
+# block b starts at HEADER_SIZE + b * records per block * record size.
+HEADER = '<4sBBHIHH'
+HEADER_SIZE = struct.calcsize(HEADER)
+
+class SensorLog:
+
+    # Append-only log of fixed-size binary records on flash.
+    #
+    # A record is a u32 timestamp (seconds) followed by `fields` int16
+    # values in units of 1/scale. Records are collected in a RAM block and
+    # written out a whole block at a time, as one write appended to the end
+    # of the file: 2048 records per write with the defaults. A block is
+    # four of the flash's 4 kB erase blocks, and nothing already on flash
+    # is ever rewritten; LittleFS copies a file from the write position to
+    # its end when a write lands before the end, so seeking back would
+    # cost far more than the write itself. flush() writes a partial block,
+    # and append() does so itself once the oldest pending record is
+    # max_age_s old, bounding what a power cut can lose.
+    #
+    # The log rotates over `files` files named <prefix>0.bin, <prefix>1.bin,
+    # ..., each holding blocks_per_file blocks; when the last one is full the
+    # oldest is overwritten. Records are fixed size, so where each block
+    # starts follows from the header, and read(since) finds its starting
+    # point by a binary search over the blocks' first timestamps rather
+    # than a scan. tools/decode_log.py turns the files into CSV on the host.
+    #
+    # Timestamps must not go backwards.
+
+    def __init__(self, prefix='log', files=4, fields=2, scale=10,
+                 block_size=16384, blocks_per_file=8, max_age_s=300):
+        self.prefix = prefix
+        self.files = files
+        self.fields = fields
+        self.scale = scale
+        self.record = '<I' + 'h' * fields
+        self.record_size = struct.calcsize(self.record)
+        self.per_block = block_size // self.record_size
+        self.blocks = blocks_per_file
+        self.capacity = self.per_block * blocks_per_file
+        self.data_start = HEADER_SIZE
+        self.max_age_s = max_age_s
+        self.block = bytearray(self.per_block * self.record_size)
+        self.values = [0] * fields
+        self.pending = 0        # records in self.block
+        self.written = 0        # records on flash in the current file
+        self.first_pending = 0
+        self.seq = 0
+        self.file = None
+        self.flushes = 0
+        self.open_latest()
+
+    def path(self, seq):
+        return '%s%d.bin' % (self.prefix, seq % self.files)
+
+    def header(self, f):
+        # Returns (seq, records per block, blocks per file, fields, scale)
+        # of an open log file, or None if it isn't one.
+        f.seek(0)
+        data = f.read(HEADER_SIZE)
+        if len(data) < HEADER_SIZE:
+            return None
+        magic, version, fields, scale, seq, per_block, blocks = struct.unpack(
+            HEADER, data)
+        if magic != MAGIC or version != VERSION:
+            return None
+        return seq, per_block, blocks, fields, scale
+
+    def headers(self):
+        # (seq, path) of every log file present, oldest first.
+        found = []
+        for i in range(self.files):
+            path = '%s%d.bin' % (self.prefix, i)
+            try:
+                f = open(path, 'rb')
+            except OSError:
+                continue
+            header = self.header(f)
+            f.close()
+            if header is not None and header[1:] == (
+                    self.per_block, self.blocks, self.fields, self.scale):
+                found.append((header[0], path))
+        found.sort()
+        return found
+
+    def open_latest(self):
+        found = self.headers()
+        if not found:
+            self.start_file(0)
+            return
+        seq, path = found[-1]
+        f = open(path, 'r+b')
+        size = f.seek(0, 2)
+        written = (size - self.data_start) // self.record_size
+        if written >= self.capacity:
+            f.close()
+            self.start_file(seq + 1)
+            return
+        # Drop the tail of a record cut short by a reset.
+        f.seek(self.data_start + written * self.record_size)
+        self.file = f
+        self.seq = seq
+        self.written = written
+
+    def start_file(self, seq):
+        if self.file is not None:
+            self.file.close()
+        f = open(self.path(seq), 'wb+')
+        f.write(struct.pack(HEADER, MAGIC, VERSION, self.fields, self.scale,
+                            seq, self.per_block, self.blocks))
+        f.flush()
+        self.file = f
+        self.seq = seq
+        self.written = 0
+
+    def append(self, t, *values):
+        scale = self.scale
+        for i in range(self.fields):
+            v = int(round(values[i] * scale))
+            self.values[i] = -32768 if v < -32768 else 32767 if v > 32767 else v
+        struct.pack_into(self.record, self.block,
+                         self.pending * self.record_size, t, *self.values)
+        if not self.pending:
+            self.first_pending = t
+        self.pending += 1
+        if (self.pending == self.per_block or
+                self.written + self.pending == self.capacity or
+                t - self.first_pending >= self.max_age_s):
+            self.flush()
+
+    def flush(self):
+        # Appends the pending records to the file in one write.
+        if not self.pending:
+            return
+        f = self.file
+        end = self.written + self.pending
+        f.write(memoryview(self.block)[:self.pending * self.record_size])
+        f.flush()
+        self.written = end
+        self.pending = 0
+        self.flushes += 1
+        if end >= self.capacity:
+            self.start_file(self.seq + 1)
+
+    def close(self):
+        self.flush()
+        self.file.close()
+        self.file = None
+
+    def read(self, since=0, until=None):
+        # Yields (t, values) for the records with since <= t (< until if
+        # given), oldest first. Pending records are flushed first.
+        self.flush()
+        size = self.record_size
+        stride = self.per_block * size
+        for seq, path in self.headers():
+            f = open(path, 'rb')
+            try:
+                count = (f.seek(0, 2) - self.data_start) // size
+                if not count:
+                    continue
+                if until is not None and self.first_time(f, 0) >= until:
+                    return
+                # Start at the last block that begins at or before `since`.
+                lo, hi = 0, (count - 1) // self.per_block
+                while lo < hi:
+                    mid = (lo + hi + 1) // 2
+                    if self.first_time(f, mid * stride) > since:
+                        hi = mid - 1
+                    else:
+                        lo = mid
+                f.seek(self.data_start + lo * stride)
+                while True:
+                    data = f.read(size)
+                    if len(data) < size:
+                        break
+                    record = struct.unpack(self.record, data)
+                    t = record[0]
+                    if until is not None and t >= until:
+                        return
+                    if t >= since:
+                        yield t, tuple(v / self.scale for v in record[1:])
+            finally:
+                f.close()
+
+    def first_time(self, f, offset):
+        # The timestamp of the record offset bytes into an open file's data.
+        f.seek(self.data_start + offset)
+        return struct.unpack('<I', f.read(4))[0]
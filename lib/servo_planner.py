@@ -0,0 +1,141 @@
+from array import array
+from math import pi, sin, sqrt
+from machine import Timer, disable_irq, enable_irq
+
+class ServoPlanner:
+
+    # Moves a hobby servo along an acceleration-limited path without ever
+    # blocking the caller.
+    #
+    # move_to() plans the whole move up front as one PWM duty value per
+    # servo frame (rate_hz, 50 by default, which is the servo's own update
+    # rate) into a preallocated array, and a periodic Timer callback plays
+    # it back one value per tick. Positions are duty_u16 values; max_speed
+    # is in duty units per second and accel in duty units per second^2.
+    #
+    # 'trapezoid' profiles accelerate at accel up to max_speed, cruise and
+    # brake so as to arrive at rest. 'scurve' profiles use a cycloidal path
+    # instead, whose acceleration also ramps smoothly from and to zero, for
+    # gentler starts and stops. A new move_to() during a move takes over
+    # from the current position and speed, so the door turns around
+    # without a jolt; an S-curve only applies to moves that start at rest.
+    #
+    # Two profile buffers are used, so a new plan is built while the old
+    # one keeps playing and then swapped in with interrupts briefly off.
+
+    def __init__(self, pwm, position, max_speed=6000, accel=20000,
+                 rate_hz=50, profile='trapezoid', max_steps=250):
+        self.pwm = pwm
+        self.rate_hz = rate_hz
+        self.dt = 1 / rate_hz
+        self.max_speed = max_speed
+        self.accel = accel
+        self.shape = profile
+        self.buffers = (array('H', [0] * max_steps),
+                        array('H', [0] * max_steps))
+        self.active = 0
+        self.profile = self.buffers[0]
+        self.length = 0
+        self.index = 0
+        self.position = position
+        self.target = position
+        pwm.duty_u16(position)
+        self.timer = Timer(mode=Timer.PERIODIC, freq=rate_hz,
+                           callback=self._step)
+
+    def _step(self, timer):
+        i = self.index
+        if i < self.length:
+            duty = self.profile[i]
+            self.pwm.duty_u16(duty)
+            self.position = duty
+            self.index = i + 1
+
+    def moving(self):
+        return self.index < self.length
+
+    def remaining_ms(self):
+        return (self.length - self.index) * 1000 // self.rate_hz
+
+    def velocity(self):
+        # Current speed in duty units per second, from the last two frames.
+        i = self.index
+        if i < 2 or i >= self.length:
+            return 0.0
+        return (self.profile[i - 1] - self.profile[i - 2]) * self.rate_hz
+
+    def move_to(self, target):
+        # Starts moving towards target, from wherever the servo is now.
+        start = self.position
+        speed = self.velocity()
+        buf = self.buffers[self.active ^ 1]
+        if self.shape == 'scurve' and speed == 0:
+            n = self._plan_scurve(buf, start, target)
+        else:
+            n = self._plan_trapezoid(buf, start, speed, target)
+        irq = disable_irq()
+        self.active ^= 1
+        self.profile = buf
+        self.length = n
+        self.index = 0
+        enable_irq(irq)
+        self.target = target
+
+    def _plan_trapezoid(self, buf, pos, speed, target):
+        # Each frame takes the fastest speed that is within accel of the
+        # last one, within max_speed, and still slow enough to stop at the
+        # target. Braking from k*dv in steps of dv covers
+        # dt*dv*k*(k+1)/2, so at distance d that speed is
+        # dv*(sqrt(1 + 8d/(dt*dv)) - 1)/2. Moving away from the target,
+        # the rule brakes and turns around.
+        dt = self.dt
+        dv = self.accel * dt
+        k = 8 / (dt * dv)
+        max_steps = len(buf)
+        pos = float(pos)
+        n = 0
+        while n < max_steps:
+            distance = target - pos
+            if abs(distance) < 1 and abs(speed) <= dv:
+                break
+            direction = 1 if distance > 0 else -1
+            toward = speed * direction
+            toward = max(min(toward + dv, self.max_speed,
+                             dv * (sqrt(1 + k * abs(distance)) - 1) / 2),
+                         toward - dv)
+            speed = toward * direction
+            pos += speed * dt
+            if (target - pos) * direction <= 0:
+                pos = target
+                speed = 0.0
+            buf[n] = int(pos + 0.5)
+            n += 1
+        return self._finish(buf, n, target)
+
+    def _plan_scurve(self, buf, pos, target):
+        # Cycloidal move: p(t) = D * (t/T - sin(2 pi t/T) / (2 pi)). Its peak
+        # speed is 2D/T and its peak acceleration 2 pi D/T^2; T is the
+        # shortest duration that keeps both within limits.
+        distance = target - pos
+        d = abs(distance)
+        if not d:
+            return 0
+        duration = max(sqrt(2 * pi * d / self.accel), 2 * d / self.max_speed)
+        steps = min(int(duration * self.rate_hz) + 1, len(buf))
+        for n in range(steps):
+            x = (n + 1) / steps
+            buf[n] = int(pos + distance * (x - sin(2 * pi * x) / (2 * pi))
+                         + 0.5)
+        return self._finish(buf, steps, target)
+
+    def _finish(self, buf, n, target):
+        # Makes sure the move ends exactly on target.
+        if n and buf[n - 1] == target:
+            return n
+        if n == len(buf):
+            n -= 1
+        buf[n] = target
+        return n + 1
+
+    def deinit(self):
+        self.timer.deinit()
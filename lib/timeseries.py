@@ -0,0 +1,157 @@
+from array import array
+
+# Rollup resolutions: (seconds per bucket, buckets kept). One hour of
+# minutes, a day of 10 minute buckets and two days of hours.
+TIERS = ((60, 60), (600, 144), (3600, 48))
+
+# Marks a bucket in which no samples arrived.
+MISSING = {'h': -32768, 'H': 65535}
+
+class Rollup:
+
+    # Ring of min/mean/max buckets at one resolution. The bucket being
+    # filled is accumulated in plain integers and written out when a sample
+    # from a later bucket arrives.
+
+    def __init__(self, period, size, typecode):
+        self.period = period
+        self.size = size
+        self.lo = array(typecode, [0] * size)
+        self.mean = array(typecode, [0] * size)
+        self.hi = array(typecode, [0] * size)
+        self.missing = MISSING[typecode]
+        self.head = 0           # next slot to write
+        self.count = 0          # closed buckets kept
+        self.bucket = None      # number of the bucket being filled
+        self.acc_lo = 0
+        self.acc_hi = 0
+        self.acc_sum = 0
+        self.acc_n = 0
+
+    def add(self, t, value):
+        bucket = t // self.period
+        if bucket != self.bucket:
+            if self.bucket is not None:
+                self.close()
+                # Buckets without samples in between.
+                for _ in range(min(bucket - self.bucket - 1, self.size)):
+                    self.push(self.missing, self.missing, self.missing)
+            self.bucket = bucket
+            self.acc_lo = self.acc_hi = value
+            self.acc_sum = 0
+            self.acc_n = 0
+        elif value < self.acc_lo:
+            self.acc_lo = value
+        elif value > self.acc_hi:
+            self.acc_hi = value
+        self.acc_sum += value
+        self.acc_n += 1
+
+    def close(self):
+        self.push(self.acc_lo, (self.acc_sum + self.acc_n // 2) // self.acc_n,
+                  self.acc_hi)
+
+    def push(self, lo, mean, hi):
+        head = self.head
+        self.lo[head] = lo
+        self.mean[head] = mean
+        self.hi[head] = hi
+        self.head = (head + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+
+class TimeSeries:
+
+    # Bounded history of one measurement, such as a temperature.
+    #
+    # Values are stored as integers in units of 1/scale (tenths of a degree
+    # by default) in array(typecode): 'h' for signed values, 'H' for values
+    # that can't go negative. The last raw_size samples are kept with their
+    # timestamps, and every sample also updates the min/mean/max rollups of
+    # each tier as it arrives, so no rollup ever needs the raw data again.
+    # Everything is allocated here; memory() tells how much, 2232 bytes
+    # with the default sizes.
+    #
+    # Timestamps are whole seconds, e.g. from utime.time(), and must not go
+    # backwards.
+
+    def __init__(self, raw_size=120, tiers=TIERS, typecode='h', scale=10):
+        self.scale = scale
+        self.typecode = typecode
+        self.missing = MISSING[typecode]
+        if typecode == 'h':
+            self.lowest, self.highest = -32767, 32767
+        else:
+            self.lowest, self.highest = 0, 65534
+        self.raw_size = raw_size
+        self.values = array(typecode, [0] * raw_size)
+        self.times = array('I', [0] * raw_size)
+        self.head = 0
+        self.count = 0
+        self.rollups = [Rollup(period, size, typecode)
+                        for period, size in tiers]
+
+    def memory(self):
+        # Bytes of sample storage, fixed at construction.
+        total = self.raw_size * (2 + 4)
+        for rollup in self.rollups:
+            total += rollup.size * 3 * 2
+        return total
+
+    def add(self, t, value):
+        value = int(round(value * self.scale))
+        if value < self.lowest:
+            value = self.lowest
+        elif value > self.highest:
+            value = self.highest
+        head = self.head
+        self.values[head] = value
+        self.times[head] = t
+        self.head = (head + 1) % self.raw_size
+        if self.count < self.raw_size:
+            self.count += 1
+        for rollup in self.rollups:
+            rollup.add(t, value)
+
+    def rollup(self, period):
+        for rollup in self.rollups:
+            if rollup.period == period:
+                return rollup
+        raise ValueError('no %d s rollup' % period)
+
+    def unscale(self, value):
+        if value == self.missing:
+            return None
+        return value / self.scale
+
+    def last(self, n, period=0):
+        # Returns up to n of the most recent points, oldest first. With
+        # period=0 these are the raw samples as (time, value); otherwise
+        # the closed buckets of that rollup as (start time, min, mean, max),
+        # with None for buckets that got no samples.
+        points = []
+        if not period:
+            n = min(n, self.count)
+            for i in range(n):
+                j = (self.head - n + i) % self.raw_size
+                points.append((self.times[j], self.unscale(self.values[j])))
+            return points
+        rollup = self.rollup(period)
+        n = min(n, rollup.count)
+        for i in range(n):
+            j = (rollup.head - n + i) % rollup.size
+            points.append(((rollup.bucket - n + i) * period,
+                           self.unscale(rollup.lo[j]),
+                           self.unscale(rollup.mean[j]),
+                           self.unscale(rollup.hi[j])))
+        return points
+
+    def current(self, period):
+        # (start time, min, mean, max) of the bucket still being filled, or
+        # None before the first sample.
+        rollup = self.rollup(period)
+        if not rollup.acc_n:
+            return None
+        return (rollup.bucket * period, rollup.acc_lo / self.scale,
+                rollup.acc_sum / rollup.acc_n / self.scale,
+                rollup.acc_hi / self.scale)
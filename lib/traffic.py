@@ -0,0 +1,238 @@
+from array import array
+from machine import Pin, Timer, mem32
+from utime import ticks_add, ticks_diff, ticks_ms, ticks_us
+
+SIO_GPIO_OUT_XOR = 0xd000001c   # RP2040: toggle GPIO outputs by mask
+
+NO_DETECTOR = 255               # an Actuated phase that always runs its min
+
+def mask(*gpios):
+    # Output mask with the given GPIO numbers set, for a phase table.
+    m = 0
+    for gpio in gpios:
+        m |= 1 << gpio
+    return m
+
+class PhaseEngine:
+
+    # Runs a traffic light from a table of phases.
+    #
+    # phases is a sequence of (mask, duration_ms): the lamps lit during the
+    # phase, as a GPIO output mask (see mask()), and how long it lasts. The
+    # table repeats forever. Each transition is one write to the RP2040's
+    # SIO XOR register, toggling exactly the lamps that change, so all of
+    # them switch together.
+    #
+    # Transitions are driven by a one-shot Timer that the callback re-arms
+    # for the next phase. Deadlines are kept in absolute ticks_us, so a late
+    # callback doesn't push back the phases after it. The timer counts
+    # whole msec and is rounded up, so a transition comes up to 1 msec
+    # late, but never early and without waiting inside the IRQ. The main
+    # loop is free for other work.
+    #
+    # jitter_us holds, per phase, the worst lateness of its start in usec,
+    # and worst_us the worst over all phases.
+
+    def __init__(self, gpios, phases):
+        self.masks = array('I', [m for m, _ in phases])
+        self.durations = array('I', [d for _, d in phases])
+        self.jitter_us = array('i', [0] * len(phases))
+        self.worst_us = 0
+        self.lamps = 0
+        for gpio in gpios:
+            Pin(gpio, Pin.OUT, value=0)
+            self.lamps |= 1 << gpio
+        self.out = 0            # lamps lit now
+        self.phase = 0
+        self.cycles = 0
+        self.deadline = 0
+        self.timer = Timer()
+        # Bound methods allocate, which a hard IRQ handler can't do.
+        self._tick_ref = self._tick
+
+    def start(self):
+        # Starts at the first phase, now.
+        self.phase = 0
+        self.deadline = ticks_us()
+        self._apply(0)
+        self._arm()
+
+    def stop(self):
+        # Stops and turns every lamp off.
+        self.timer.deinit()
+        self._write(0)
+
+    def _write(self, new):
+        mem32[SIO_GPIO_OUT_XOR] = (self.out ^ new) & self.lamps
+        self.out = new
+
+    def _apply(self, phase):
+        self._write(self.masks[phase])
+
+    def _arm(self):
+        self.deadline = ticks_add(self.deadline,
+                                  self.durations[self.phase] * 1000)
+        wait = ticks_diff(self.deadline, ticks_us())
+        period = max(1, (wait + 999) // 1000)
+        self.timer.init(mode=Timer.ONE_SHOT, period=period,
+                        callback=self._tick_ref)
+
+    def _tick(self, timer):
+        late = ticks_diff(ticks_us(), self.deadline)
+        phase = self.phase + 1
+        if phase == len(self.masks):
+            phase = 0
+            self.cycles += 1
+        self._apply(phase)
+        self.phase = phase
+        if late > self.jitter_us[phase]:
+            self.jitter_us[phase] = late
+            if late > self.worst_us:
+                self.worst_us = late
+        self._arm()
+
+def green_wave(distances_m, speed_kmh, cycle_ms):
+    # Offsets in msec for junctions distances_m along a road from the first
+    # one, so that each turns green as a platoon that left the first at the
+    # start of its green, driving at speed_kmh, arrives.
+    return [int(d * 3600 / speed_kmh + 0.5) % cycle_ms for d in distances_m]
+
+def _gcd(a, b):
+    while b:
+        a, b = b, a % b
+    return a
+
+class Corridor(PhaseEngine):
+
+    # Several junctions run off one timebase, each with its own phase table
+    # and an offset: how long after the corridor starts its table starts.
+    # junctions is a sequence of (gpios, phases, offset_ms), with phases as
+    # for PhaseEngine and no GPIO shared between junctions.
+    #
+    # The tables are merged up front into one table over the common cycle
+    # (the least common multiple of the junctions' cycles), with a row
+    # wherever any junction changes phase. That table runs on the single
+    # Timer of a PhaseEngine, so however many junctions there are, each
+    # transition is one callback and one register write, and every
+    # junction keeps to the same absolute deadlines, without drift between
+    # them. The merged table has at most one row per phase per junction for
+    # each repeat of the junction's table in the common cycle.
+
+    def __init__(self, junctions, max_rows=128):
+        gpios = []
+        cycle = 1
+        for pins, phases, offset_ms in junctions:
+            for gpio in pins:
+                if gpio in gpios:
+                    raise ValueError('GPIO %d used twice' % gpio)
+                gpios.append(gpio)
+            length = sum(d for _, d in phases)
+            cycle = cycle * length // _gcd(cycle, length)
+        self.cycle_ms = cycle
+        self.offsets = [offset_ms % cycle for _, _, offset_ms in junctions]
+        cuts = {0}
+        for (_, phases, _), offset in zip(junctions, self.offsets):
+            length = sum(d for _, d in phases)
+            t = offset
+            for _ in range(cycle // length):
+                for _, d in phases:
+                    cuts.add(t % cycle)
+                    t += d
+        if len(cuts) > max_rows:
+            raise ValueError('merged table needs %d rows' % len(cuts))
+        cuts = sorted(cuts)
+        cuts.append(cycle)
+        table = []
+        for i in range(len(cuts) - 1):
+            t = cuts[i]
+            m = 0
+            for (_, phases, _), offset in zip(junctions, self.offsets):
+                m |= self._mask_at(phases, t - offset)
+            table.append((m, cuts[i + 1] - t))
+        PhaseEngine.__init__(self, gpios, table)
+
+    @staticmethod
+    def _mask_at(phases, t):
+        # The mask of the phase a table is in, t msec after it (re)started.
+        t %= sum(d for _, d in phases)
+        for m, d in phases:
+            if t < d:
+                return m
+            t -= d
+
+class Actuated(PhaseEngine):
+
+    # A traffic light whose greens follow the traffic, from presence
+    # detectors at the stop lines.
+    #
+    # phases is a sequence of (mask, min_ms, max_ms, detector), detector
+    # being an index into detectors or NO_DETECTOR. A phase without a
+    # detector, such as a yellow, lasts min_ms. A green with one lasts at
+    # least min_ms; after that it ends when its detector has seen nothing
+    # for gap_ms (gap-out) or at max_ms (max-out), but only once some other
+    # approach has a vehicle waiting. With nobody waiting elsewhere the
+    # green rests where it is.
+    #
+    # detectors are functions returning true while a vehicle is present.
+    # They are sampled every tick_ms by a periodic Timer callback, which
+    # makes every decision, so the core is free in between. That callback
+    # is a hard IRQ, so a detector must not allocate, which rules out any
+    # float arithmetic. EdgeInput.value of an IR sensor is safe, and so is
+    # a test on a ranging.Ranger's integer echo widths, e.g.
+    # lambda: 0 <= ranger.widths[0] < 2915 for a vehicle within 50 cm.
+    # gap_outs and max_outs count how greens ended.
+
+    def __init__(self, gpios, phases, detectors, gap_ms=3000, tick_ms=100):
+        PhaseEngine.__init__(self, gpios, [(m, lo) for m, lo, _, _ in phases])
+        self.max_ms = array('I', [hi for _, _, hi, _ in phases])
+        self.detector_of = bytearray(d for _, _, _, d in phases)
+        self.detectors = detectors
+        self.calls = bytearray(len(detectors))
+        self.seen = array('i', [0] * len(detectors))
+        self.gap_ms = gap_ms
+        self.tick_ms = tick_ms
+        self.started = 0
+        self.gap_outs = 0
+        self.max_outs = 0
+
+    def start(self):
+        self.phase = 0
+        self.started = ticks_ms()
+        self._apply(0)
+        self.timer.init(mode=Timer.PERIODIC, period=self.tick_ms,
+                        callback=self._tick_ref)
+
+    def _tick(self, timer):
+        now = ticks_ms()
+        phase = self.phase
+        green = self.detector_of[phase]
+        waiting = False
+        for d in range(len(self.detectors)):
+            if self.detectors[d]():
+                self.seen[d] = now
+                if d != green:
+                    self.calls[d] = 1
+            if d != green and self.calls[d]:
+                waiting = True
+        elapsed = ticks_diff(now, self.started)
+        if elapsed < self.durations[phase]:
+            return
+        if green != NO_DETECTOR:
+            if not waiting:
+                return
+            if ticks_diff(now, self.seen[green]) >= self.gap_ms:
+                self.gap_outs += 1
+            elif elapsed >= self.max_ms[phase]:
+                self.max_outs += 1
+            else:
+                return
+        phase += 1
+        if phase == len(self.masks):
+            phase = 0
+            self.cycles += 1
+        self._apply(phase)
+        self.phase = phase
+        self.started = now
+        green = self.detector_of[phase]
+        if green != NO_DETECTOR:
+            self.calls[green] = 0
@@ -0,0 +1,270 @@
+# Host stand-in for MicroPython's asyncio, run on the virtual clock.
+#
+# Covers what the board scripts use: run, create_task, sleep, sleep_ms,
+# gather, wait_for(_ms), Event, ThreadSafeFlag, Lock and Task.cancel. While
+# every task is waiting the scheduler advances the virtual clock to the next
+# task wake-up or simulated hardware event (pin edge, timer), whichever
+# comes first, so IRQ handlers that set a flag wake their task on time.
+
+import heapq
+import traceback
+
+from simcore import clock, recorder
+
+
+class CancelledError(BaseException):
+    pass
+
+
+class TimeoutError(Exception):
+    pass
+
+
+class _Sleep:
+
+    def __init__(self, us):
+        self.us = us
+
+    def __await__(self):
+        yield self
+
+
+class _Block:
+    # Parks the running task on a waiter list until something readies it.
+
+    def __init__(self, waiters):
+        self.waiters = waiters
+
+    def __await__(self):
+        yield self
+
+
+class Task:
+
+    def __init__(self, coro):
+        self.coro = coro
+        self.done = False
+        self.result = None
+        self.exc = None
+        self.waiters = []
+        self.gen = 0            # invalidates stale sleep entries
+        self.throw = None
+
+    def __await__(self):
+        if not self.done:
+            yield _Block(self.waiters)
+        if self.exc is not None:
+            raise self.exc
+        return self.result
+
+    def cancel(self):
+        if self.done:
+            return False
+        self.throw = CancelledError()
+        _loop.make_ready(self)
+        return True
+
+
+class _Loop:
+
+    def __init__(self):
+        self.ready = []
+        self.sleeping = []
+        self.seq = 0
+        self.current = None
+        self.main = None
+
+    def make_ready(self, task):
+        task.gen += 1
+        if task not in self.ready:
+            self.ready.append(task)
+
+    def sleep(self, task, us):
+        task.gen += 1
+        self.seq += 1
+        heapq.heappush(self.sleeping,
+                       (clock.now_us + max(0, us), self.seq, task.gen, task))
+
+    def step(self, task):
+        self.current = task
+        try:
+            if task.throw is not None:
+                exc, task.throw = task.throw, None
+                request = task.coro.throw(exc)
+            else:
+                request = task.coro.send(None)
+        except StopIteration as stop:
+            self.finish(task, stop.value, None)
+            return
+        except BaseException as exc:
+            if isinstance(exc, (KeyboardInterrupt, SystemExit)) or (
+                    type(exc).__name__ == 'SimTimeLimit'):
+                raise
+            unobserved = not task.waiters and task is not self.main
+            self.finish(task, None, exc)
+            if unobserved and not isinstance(exc, CancelledError):
+                # As MicroPython does: report it and keep the loop going.
+                print('Task exception wasn\'t retrieved')
+                traceback.print_exception(type(exc), exc, exc.__traceback__)
+            return
+        finally:
+            self.current = None
+        recorder.record('async_step')
+        if isinstance(request, _Sleep):
+            self.sleep(task, request.us)
+        elif isinstance(request, _Block):
+            task.gen += 1
+            request.waiters.append(task)
+        else:
+            self.make_ready(task)
+
+    def finish(self, task, result, exc):
+        task.done = True
+        task.result = result
+        task.exc = exc
+        for waiter in task.waiters:
+            self.make_ready(waiter)
+        task.waiters = []
+
+    def wake_sleepers(self):
+        while self.sleeping and self.sleeping[0][0] <= clock.now_us:
+            _, _, gen, task = heapq.heappop(self.sleeping)
+            if gen == task.gen and not task.done:
+                self.make_ready(task)
+
+    def run_until(self, main):
+        self.main = main
+        while not main.done:
+            self.wake_sleepers()
+            if self.ready:
+                ready, self.ready = self.ready, []
+                for task in ready:
+                    if not task.done:
+                        self.step(task)
+                continue
+            targets = [at for at in (
+                self.sleeping[0][0] if self.sleeping else None,
+                clock.next_event_us()) if at is not None]
+            if targets:
+                clock.advance_to(max(min(targets), clock.now_us))
+            else:
+                clock.advance(1000)
+        if main.exc is not None:
+            raise main.exc
+        return main.result
+
+
+_loop = _Loop()
+
+
+def create_task(coro):
+    task = Task(coro)
+    _loop.make_ready(task)
+    return task
+
+
+def current_task():
+    return _loop.current
+
+
+def run(coro):
+    global _loop
+    _loop = _Loop()
+    return _loop.run_until(create_task(coro))
+
+
+def sleep(seconds):
+    return _Sleep(int(seconds * 1000000))
+
+
+def sleep_ms(ms):
+    return _Sleep(int(ms * 1000))
+
+
+async def gather(*aws, return_exceptions=False):
+    tasks = [aw if isinstance(aw, Task) else create_task(aw) for aw in aws]
+    results = []
+    for task in tasks:
+        try:
+            results.append(await task)
+        except Exception as exc:
+            if not return_exceptions:
+                raise
+            results.append(exc)
+    return results
+
+
+async def wait_for_ms(aw, timeout_ms):
+    task = aw if isinstance(aw, Task) else create_task(aw)
+    deadline = clock.now_us + int(timeout_ms * 1000)
+    while not task.done:
+        if clock.now_us >= deadline:
+            task.cancel()
+            raise TimeoutError()
+        await _Sleep(min(1000, deadline - clock.now_us))
+    return await task
+
+
+def wait_for(aw, timeout):
+    return wait_for_ms(aw, timeout * 1000)
+
+
+class Event:
+
+    def __init__(self):
+        self.state = False
+        self.waiters = []
+
+    def is_set(self):
+        return self.state
+
+    def set(self):
+        self.state = True
+        for task in self.waiters:
+            _loop.make_ready(task)
+        self.waiters = []
+
+    def clear(self):
+        self.state = False
+
+    async def wait(self):
+        while not self.state:
+            await _Block(self.waiters)
+        return True
+
+
+class ThreadSafeFlag(Event):
+    # Set from an IRQ handler; wait() clears it again.
+
+    async def wait(self):
+        while not self.state:
+            await _Block(self.waiters)
+        self.state = False
+
+
+class Lock:
+
+    def __init__(self):
+        self.state = False
+        self.waiters = []
+
+    def locked(self):
+        return self.state
+
+    async def acquire(self):
+        while self.state:
+            await _Block(self.waiters)
+        self.state = True
+        return True
+
+    def release(self):
+        self.state = False
+        waiters, self.waiters = self.waiters, []
+        for task in waiters:
+            _loop.make_ready(task)
+
+    async def __aenter__(self):
+        return await self.acquire()
+
+    async def __aexit__(self, *args):
+        self.release()
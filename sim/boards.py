@@ -0,0 +1,96 @@
+# Board setups for the scripts in this project: which device models are
+# wired to which pins. Each setup returns a dict of the models it attached,
+# for run.py to report on.
+
+import machine
+import hd44780
+import sensors
+
+
+def i2c_lcd_20x4():
+    return {'lcd': machine.attach_i2c(hd44780.Pcf8574Lcd(0x27, 4, 20), 0, 1)}
+
+
+def i2c_lcd_16x2():
+    # One of the slower backpacks, which garbles bytes above 300 kHz.
+    return {'lcd': machine.attach_i2c(
+        hd44780.Pcf8574Lcd(0x27, 2, 16, max_freq=300000), 0, 1)}
+
+
+def gpio_lcd():
+    return {'lcd': hd44780.GpioLcd(16, 17, (18, 19, 20, 21))}
+
+
+def weather():
+    models = gpio_lcd()
+    models['dht'] = sensors.DhtModel(
+        22, 'DHT11', temperature=lambda t: 21 + int(t / 60) % 3,
+        humidity=lambda t: 48 + int(t / 90) % 4)
+    return models
+
+
+def dht22():
+    return {'dht': sensors.DhtModel(
+        14, 'DHT22', temperature=lambda t: 21.0 + (t % 600) / 100,
+        humidity=55.5, fail_rate=0.05)}
+
+
+def ultrasonic():
+    # Somebody walks up to the door and away again every 10 seconds.
+    return {'sonar': sensors.Hcsr04(
+        16, 17, distance_cm=lambda t: 30.0 if t % 10 < 3 else 180.0)}
+
+
+def ir_door():
+    # The IR sensor output idles low and goes high for half a second when
+    # somebody passes, once every 15 seconds, with some chatter on each
+    # edge. Every third pass comes 6.2 seconds after the previous one, while
+    # the door is closing.
+    sensors.pulse_train(1, period_s=15, high_s=0.5, first_s=1, bounces=3)
+    sensors.pulse_train(1, period_s=45, high_s=0.5, first_s=7.2, bounces=3)
+    return {}
+
+
+def combined():
+    # combined_app.py: the weather station, the IR door and an ultrasonic
+    # presence sensor on one board.
+    models = weather()
+    sensors.pulse_train(1, period_s=15, high_s=0.5, first_s=1)
+    models['sonar'] = sensors.Hcsr04(
+        3, 4, distance_cm=lambda t: 30.0 if t % 10 < 3 else 180.0)
+    return models
+
+
+def traffic():
+    # Stop-line detectors for the actuated mode: a car on the side road
+    # (GP3) every 30 seconds and a short stream on the main road (GP2).
+    sensors.pulse_train(3, period_s=30, high_s=4, first_s=12)
+    sensors.pulse_train(2, period_s=30, high_s=8, first_s=25)
+    return {}
+
+
+BOARDS = {
+    'i2c_lcd_20x4': i2c_lcd_20x4,
+    'i2c_lcd_16x2': i2c_lcd_16x2,
+    'gpio_lcd': gpio_lcd,
+    'weather': weather,
+    'dht22': dht22,
+    'ultrasonic': ultrasonic,
+    'ir_door': ir_door,
+    'traffic': traffic,
+    'combined': combined,
+}
+
+# Default board for each script, by file name.
+SCRIPTS = {
+    'pico_i2c_lcd_test.py': 'i2c_lcd_20x4',
+    'example.py': 'i2c_lcd_16x2',
+    'i2cscan.py': 'i2c_lcd_16x2',
+    'lcd_16X2_correct_program.py': 'gpio_lcd',
+    'weather_monitor_dht.py': 'weather',
+    'dht_sensor_code.py': 'dht22',
+    'ultrasonic_door_control.py': 'ultrasonic',
+    'IR_door_control.py': 'ir_door',
+    'Traffic light.py': 'traffic',
+    'combined_app.py': 'combined',
+}
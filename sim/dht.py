@@ -0,0 +1,48 @@
+# Host stand-in for MicroPython's dht module. Readings come from the
+# DhtModel attached to the sensor's pin (see sensors.py); a default model
+# with constant readings is created on first use.
+
+from simcore import devices
+
+
+class DHTBase:
+
+    MODEL = 'DHT22'
+
+    def __init__(self, pin):
+        self.pin = pin._state.id
+        self.buf = bytearray(5)
+        self._t = 0
+        self._h = 0
+
+    def _model(self):
+        model = devices.get(('dht', self.pin))
+        if model is None:
+            import sensors
+            model = sensors.DhtModel(self.pin, self.MODEL)
+        return model
+
+    def measure(self):
+        self._t, self._h = self._model().measure()
+
+
+class DHT11(DHTBase):
+
+    MODEL = 'DHT11'
+
+    def humidity(self):
+        return int(self._h)
+
+    def temperature(self):
+        return int(self._t)
+
+
+class DHT22(DHTBase):
+
+    MODEL = 'DHT22'
+
+    def humidity(self):
+        return round(self._h, 1)
+
+    def temperature(self):
+        return round(self._t, 1)
@@ -0,0 +1,272 @@
+# Behavioural model of an HD44780 character LCD controller, plus the two
+# ways this project wires one up: a PCF8574 I2C backpack and direct GPIO.
+#
+# The model decodes the enable-strobed nibble/byte stream back into DDRAM
+# and CGRAM contents, so a test can assert on what the display would show,
+# and it keeps count of every latch, command and write issued while the
+# controller was still busy with the previous instruction.
+
+from simcore import clock, recorder
+import machine
+
+EXEC_US = 37            # Most instructions
+DATA_US = 41            # Data writes: 37 + 4 usec address update
+CLEAR_US = 1520         # Clear display / return home
+
+
+class Hd44780:
+
+    def __init__(self, num_lines=2, num_columns=16):
+        self.num_lines = num_lines
+        self.num_columns = num_columns
+        self.ddram = bytearray(b' ' * 0x80)
+        self.cgram = bytearray(64)
+        self.addr = 0
+        self.cg_mode = False
+        self.dl8 = True
+        self.high_nibble = None
+        self.read_phase = 0
+        self.increment = True
+        self.display = False
+        self.cursor = False
+        self.blink = False
+        self.two_lines = False
+        self.resets = 0
+        self.busy_until = 0
+        self.violations = 0
+        self.latches = 0
+        self.commands = 0
+        self.data_writes = 0
+        self.ddram_sets = 0
+        self.cgram_writes = 0
+        self.clears = 0
+
+    # -- bus side ---------------------------------------------------------
+
+    def busy(self):
+        return clock.now_us < self.busy_until
+
+    def latch(self, rs, bits):
+        # One falling edge of E with RW low. bits holds D7..D0 as seen on the
+        # bus; in 4-bit wiring D3..D0 are not connected and read as 0.
+        self.latches += 1
+        recorder.record('lcd_latch', rs, bits)
+        if self.busy():
+            self.violations += 1
+            recorder.record('lcd_violation', rs, bits)
+        if self.dl8:
+            self._execute(rs, bits)
+        elif self.high_nibble is None:
+            self.high_nibble = bits & 0xf0
+        else:
+            value = self.high_nibble | (bits >> 4)
+            self.high_nibble = None
+            self._execute(rs, value)
+
+    def read(self, rs):
+        # Value the controller drives on D7..D0 while E is high with RW high.
+        if rs:
+            value = self.ddram[self.addr & 0x7f]
+        else:
+            value = (0x80 if self.busy() else 0) | (self.addr & 0x7f)
+        if self.dl8:
+            return value
+        self.read_phase ^= 1
+        if self.read_phase:
+            return value & 0xf0
+        return (value << 4) & 0xf0
+
+    # -- instruction set --------------------------------------------------
+
+    def _execute(self, rs, value):
+        now = clock.now_us
+        if rs:
+            self.data_writes += 1
+            if self.cg_mode:
+                self.cgram[self.addr & 0x3f] = value & 0x1f
+                self.cgram_writes += 1
+                self.addr = (self.addr + 1) & 0x3f
+            else:
+                self.ddram[self.addr & 0x7f] = value
+                self._step_ddram()
+            self.busy_until = now + DATA_US
+            return
+        self.commands += 1
+        exec_us = EXEC_US
+        if value & 0x80:
+            self.addr = value & 0x7f
+            self.cg_mode = False
+            self.ddram_sets += 1
+        elif value & 0x40:
+            self.addr = value & 0x3f
+            self.cg_mode = True
+        elif value & 0x20:
+            self.dl8 = bool(value & 0x10)
+            self.two_lines = bool(value & 0x08)
+            self.high_nibble = None
+            self.resets += 1
+            if self.resets == 1:
+                exec_us = 4100
+            elif self.resets == 2:
+                exec_us = 100
+        elif value & 0x10:
+            if not value & 0x08:
+                if value & 0x04:
+                    self._step_ddram()
+                else:
+                    self.addr = (self.addr - 1) & 0x7f
+        elif value & 0x08:
+            self.display = bool(value & 0x04)
+            self.cursor = bool(value & 0x02)
+            self.blink = bool(value & 0x01)
+        elif value & 0x04:
+            self.increment = bool(value & 0x02)
+        elif value & 0x02:
+            self.addr = 0
+            self.cg_mode = False
+            exec_us = CLEAR_US
+        elif value & 0x01:
+            self.clears += 1
+            for i in range(len(self.ddram)):
+                self.ddram[i] = 0x20
+            self.addr = 0
+            self.cg_mode = False
+            self.increment = True
+            exec_us = CLEAR_US
+        self.busy_until = now + exec_us
+
+    def _step_ddram(self):
+        if self.increment:
+            addr = self.addr + 1
+            if self.two_lines:
+                if addr == 0x28:
+                    addr = 0x40
+                elif addr >= 0x68:
+                    addr = 0
+            elif addr >= 0x50:
+                addr = 0
+        else:
+            addr = (self.addr - 1) & 0x7f
+        self.addr = addr
+
+    # -- inspection -------------------------------------------------------
+
+    def line_addr(self, y):
+        addr = 0x40 if y & 1 else 0
+        if y & 2:
+            addr += self.num_columns
+        return addr
+
+    def lines(self):
+        # Returns what each display line shows. CGRAM characters come back
+        # as chr(0)..chr(7).
+        out = []
+        for y in range(self.num_lines):
+            base = self.line_addr(y)
+            out.append(''.join(chr(c) for c in
+                               self.ddram[base:base + self.num_columns]))
+        return out
+
+    def text(self):
+        return '\n'.join(self.lines())
+
+    def cursor_xy(self):
+        for y in range(self.num_lines):
+            base = self.line_addr(y)
+            if base <= self.addr < base + self.num_columns:
+                return self.addr - base, y
+        return None
+
+    def glyph(self, slot):
+        return bytes(self.cgram[slot * 8:slot * 8 + 8])
+
+
+# PCF8574 backpack wiring
+P_RS = 0x01
+P_RW = 0x02
+P_E = 0x04
+P_BL = 0x08
+
+
+class Pcf8574:
+    # Bare PCF8574 quasi-bidirectional port expander.
+
+    def __init__(self, addr=0x27, max_freq=1000000):
+        self.addr = addr
+        self.max_freq = max_freq
+        self.port = 0xff
+        self.writes = 0
+
+    def i2c_write(self, byte):
+        self.writes += 1
+        old = self.port
+        self.port = byte
+        self.port_changed(old, byte)
+
+    def i2c_read(self):
+        return self.port
+
+    def port_changed(self, old, new):
+        pass
+
+
+class Pcf8574Lcd(Pcf8574):
+    # PCF8574 backpack with an HD44780 behind it: P0=RS, P1=RW, P2=E,
+    # P3=backlight, P4..P7=D4..D7.
+
+    def __init__(self, addr=0x27, num_lines=2, num_columns=16,
+                 max_freq=1000000):
+        Pcf8574.__init__(self, addr, max_freq)
+        self.lcd = Hd44780(num_lines, num_columns)
+        self.backlight = False
+
+    def port_changed(self, old, new):
+        self.backlight = bool(new & P_BL)
+        if old & P_E and not new & P_E and not new & P_RW:
+            self.lcd.latch(new & P_RS, new & 0xf0)
+
+
+class GpioLcd:
+    # HD44780 wired straight to GPIOs. data holds the pin ids of D0..D7;
+    # for 4-bit wiring pass None for D0..D3.
+
+    def __init__(self, rs, enable, data, rw=None, num_lines=2,
+                 num_columns=16):
+        self.lcd = Hd44780(num_lines, num_columns)
+        self.rs = rs
+        self.enable = enable
+        self.rw = rw
+        self.data = list(data)
+        if len(self.data) == 4:
+            self.data = [None] * 4 + self.data
+        self.driving = False
+        machine.on_pin_change(enable, self._enable_changed)
+
+    def _enable_changed(self, level):
+        rs = machine.pin_level(self.rs)
+        reading = self.rw is not None and machine.pin_level(self.rw)
+        if reading:
+            if level:
+                value = self.lcd.read(rs)
+                self.driving = True
+                for bit, pin_id in enumerate(self.data):
+                    if pin_id is not None:
+                        machine.drive(pin_id, (value >> bit) & 1)
+            else:
+                self._release()
+            return
+        self._release()
+        if level:
+            return
+        bits = 0
+        for bit, pin_id in enumerate(self.data):
+            if pin_id is not None and machine.pin_level(pin_id):
+                bits |= 1 << bit
+        self.lcd.latch(rs, bits)
+
+    def _release(self):
+        if self.driving:
+            self.driving = False
+            for pin_id in self.data:
+                if pin_id is not None:
+                    machine.drive(pin_id, None)
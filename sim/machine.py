@@ -0,0 +1,508 @@
+# Host stand-in for MicroPython's machine module (RP2040 flavour).
+#
+# Pins, PWM slices, I2C controllers and timers are recorded against the
+# virtual clock in simcore. Device models (LCDs, sensors) attach to pins or
+# I2C wire pairs through the helpers at the bottom of this file and react to
+# what the code under test drives.
+
+import errno
+
+from simcore import clock, recorder, devices
+
+
+class _PinState:
+    # Electrical state of one GPIO, shared by every Pin object created for it.
+
+    def __init__(self, pin_id):
+        self.id = pin_id
+        self.mode = Pin.IN
+        self.pull = None
+        self.out = 0
+        self.ext = None         # level driven from outside, None if floating
+        self.level = 0
+        self.listeners = []
+        self.irq_handler = None
+        self.irq_trigger = 0
+        self.irq_obj = None
+        self.writes = 0
+
+    def resolve(self):
+        if self.mode == Pin.OUT:
+            level = self.out
+        elif self.mode == Pin.OPEN_DRAIN:
+            level = 0 if self.out == 0 else self._input_level()
+        else:
+            level = self._input_level()
+        if level != self.level:
+            self.level = level
+            recorder.record('pin', self.id, level)
+            for listener in list(self.listeners):
+                listener(level)
+            if self.irq_handler is not None:
+                trigger = Pin.IRQ_RISING if level else Pin.IRQ_FALLING
+                if self.irq_trigger & trigger:
+                    self.irq_obj._flags = trigger
+                    recorder.record('irq', self.id, level)
+                    self.irq_handler(self.irq_obj._pin)
+
+    def _input_level(self):
+        if self.ext is not None:
+            return self.ext
+        if self.pull == Pin.PULL_UP:
+            return 1
+        return 0
+
+
+_pins = {}
+
+
+def _pin_state(pin_id):
+    pin_id = Pin._BOARD.get(pin_id, pin_id)
+    state = _pins.get(pin_id)
+    if state is None:
+        state = _pins[pin_id] = _PinState(pin_id)
+    return state
+
+
+class _Irq:
+
+    def __init__(self, pin):
+        self._pin = pin
+        self._flags = 0
+
+    def flags(self):
+        return self._flags
+
+    def trigger(self, trigger=None):
+        state = self._pin._state
+        if trigger is not None:
+            state.irq_trigger = trigger
+        return state.irq_trigger
+
+
+class Pin:
+
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    ALT = 3
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    _BOARD = {'LED': 25}
+
+    def __init__(self, pin_id, mode=-1, pull=-1, *, value=None, alt=-1):
+        self._state = _pin_state(pin_id)
+        self.init(mode, pull, value=value)
+
+    def init(self, mode=-1, pull=-1, *, value=None, alt=-1):
+        state = self._state
+        if value is not None:
+            state.out = 1 if value else 0
+        if mode != -1:
+            state.mode = mode
+        if pull != -1:
+            state.pull = pull
+        state.resolve()
+
+    def value(self, x=None):
+        state = self._state
+        if x is None:
+            clock.advance(clock.READ_COST_US)
+            return state.level
+        state.writes += 1
+        recorder.record('pin_write', state.id, x)
+        state.out = 1 if x else 0
+        state.resolve()
+
+    __call__ = value
+
+    def on(self):
+        self.value(1)
+
+    def off(self):
+        self.value(0)
+
+    high = on
+    low = off
+
+    def toggle(self):
+        self.value(0 if self._state.out else 1)
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING, *,
+            hard=False):
+        state = self._state
+        if state.irq_obj is None:
+            state.irq_obj = _Irq(self)
+        state.irq_handler = handler
+        state.irq_trigger = trigger if handler is not None else 0
+        return state.irq_obj
+
+    def __repr__(self):
+        state = self._state
+        return 'Pin(GPIO%s, mode=%s)' % (
+            state.id, ('IN', 'OUT', 'OPEN_DRAIN', 'ALT')[state.mode])
+
+
+def drive(pin_id, level):
+    # Drives a pin from outside the microcontroller, as a sensor or switch
+    # would. Pass None to release the line (pulls apply again).
+    state = _pin_state(pin_id)
+    state.ext = level
+    state.resolve()
+
+
+def pin_level(pin_id):
+    return _pin_state(pin_id).level
+
+
+def on_pin_change(pin_id, listener):
+    _pin_state(pin_id).listeners.append(listener)
+
+
+class Signal:
+
+    def __init__(self, pin, *args, invert=False, **kwargs):
+        if not isinstance(pin, Pin):
+            pin = Pin(pin, *args, **kwargs)
+        self._pin = pin
+        self._invert = invert
+
+    def value(self, x=None):
+        if x is None:
+            return self._pin.value() ^ self._invert
+        self._pin.value((1 if x else 0) ^ self._invert)
+
+    __call__ = value
+
+    def on(self):
+        self.value(1)
+
+    def off(self):
+        self.value(0)
+
+
+class PWM:
+
+    def __init__(self, pin, *, freq=None, duty_u16=None, duty_ns=None):
+        self._pin_id = pin._state.id
+        self._freq = 0
+        self._duty = 0
+        if freq is not None:
+            self.freq(freq)
+        if duty_u16 is not None:
+            self.duty_u16(duty_u16)
+        if duty_ns is not None:
+            self.duty_ns(duty_ns)
+
+    def freq(self, value=None):
+        if value is None:
+            return self._freq
+        self._freq = value
+        recorder.record('pwm_freq', self._pin_id, value)
+
+    def duty_u16(self, value=None):
+        if value is None:
+            return self._duty
+        self._duty = int(value) & 0xffff
+        recorder.record('pwm', self._pin_id, self._duty)
+
+    def duty_ns(self, value=None):
+        period_ns = 1000000000 // self._freq if self._freq else 0
+        if value is None:
+            return self._duty * period_ns // 65535
+        self.duty_u16(value * 65535 // period_ns if period_ns else 0)
+
+    def deinit(self):
+        self._duty = 0
+        recorder.record('pwm', self._pin_id, 0)
+
+
+# Valid (sda, scl) pairs of the two RP2040 I2C controllers.
+_I2C_PINS = {
+    0: ((0, 1), (4, 5), (8, 9), (12, 13), (16, 17), (20, 21)),
+    1: ((2, 3), (6, 7), (10, 11), (14, 15), (18, 19), (26, 27)),
+}
+_I2C_DEFAULT = {0: (8, 9), 1: (6, 7)}
+
+
+class I2C:
+
+    def __init__(self, i2c_id, *, scl=None, sda=None, freq=400000,
+                 timeout=50000):
+        if i2c_id not in _I2C_PINS:
+            raise ValueError('I2C(%s) doesn\'t exist' % (i2c_id,))
+        default = _I2C_DEFAULT[i2c_id]
+        sda_id = default[0] if sda is None else _id_of(sda)
+        scl_id = default[1] if scl is None else _id_of(scl)
+        if (sda_id, scl_id) not in _I2C_PINS[i2c_id]:
+            raise ValueError('bad SCL or SDA pin')
+        self._id = i2c_id
+        self._wires = (sda_id, scl_id)
+        self._freq = freq
+
+    def _bit_us(self):
+        return 1000000 / self._freq
+
+    def _device(self, addr):
+        for device in devices.get(('i2c', self._wires), ()):
+            if device.addr == addr:
+                return device
+        return None
+
+    def _transfer(self, addr, nbytes):
+        # Charges start + address + payload + stop on the virtual clock.
+        recorder.record('i2c', addr, nbytes)
+        recorder.add('i2c_bytes', nbytes)
+        clock.advance((nbytes + 1) * 9 * self._bit_us() + 2 * self._bit_us())
+
+    def _corrupt(self, device, byte, reading=False):
+        # Clocked faster than it can follow, a device samples each bit one
+        # clock late: bytes it receives come out shifted left, and bytes it
+        # sends arrive shifted right, with SDA's idle high filling in.
+        if self._freq > device.max_freq:
+            recorder.record('i2c_corrupt', device.addr, byte)
+            if reading:
+                return (byte >> 1) | 0x80
+            return ((byte << 1) | 0x01) & 0xff
+        return byte
+
+    def scan(self):
+        found = []
+        for addr in range(0x08, 0x78):
+            self._transfer(addr, 0)
+            if self._device(addr) is not None:
+                found.append(addr)
+        return found
+
+    def writeto(self, addr, buf, stop=True):
+        device = self._device(addr)
+        if device is None:
+            self._transfer(addr, 0)
+            raise OSError(errno.EIO)
+        bit_us = self._bit_us()
+        recorder.record('i2c', addr, len(buf))
+        recorder.add('i2c_bytes', len(buf))
+        clock.advance(10 * bit_us)      # start + address byte
+        for byte in buf:
+            clock.advance(9 * bit_us)
+            device.i2c_write(self._corrupt(device, byte))
+        clock.advance(bit_us)           # stop
+        return len(buf)
+
+    def writevto(self, addr, vector, stop=True):
+        return self.writeto(addr, b''.join(bytes(b) for b in vector), stop)
+
+    def readfrom_into(self, addr, buf, stop=True):
+        device = self._device(addr)
+        if device is None:
+            self._transfer(addr, 0)
+            raise OSError(errno.EIO)
+        self._transfer(addr, len(buf))
+        for i in range(len(buf)):
+            buf[i] = self._corrupt(device, device.i2c_read(), True)
+
+    def readfrom(self, addr, nbytes, stop=True):
+        buf = bytearray(nbytes)
+        self.readfrom_into(addr, buf, stop)
+        return bytes(buf)
+
+    def writeto_mem(self, addr, memaddr, buf, *, addrsize=8):
+        device = self._device(addr)
+        if device is None or not hasattr(device, 'mem_write'):
+            self._transfer(addr, 0)
+            raise OSError(errno.EIO)
+        self._transfer(addr, len(buf) + 1)
+        device.mem_write(memaddr, bytes(buf))
+
+    def readfrom_mem_into(self, addr, memaddr, buf, *, addrsize=8):
+        device = self._device(addr)
+        if device is None or not hasattr(device, 'mem_read'):
+            self._transfer(addr, 0)
+            raise OSError(errno.EIO)
+        self._transfer(addr, len(buf) + 2)
+        data = device.mem_read(memaddr, len(buf))
+        for i in range(len(buf)):
+            buf[i] = self._corrupt(device, data[i], True)
+
+    def readfrom_mem(self, addr, memaddr, nbytes, *, addrsize=8):
+        buf = bytearray(nbytes)
+        self.readfrom_mem_into(addr, memaddr, buf, addrsize=addrsize)
+        return bytes(buf)
+
+
+SoftI2C = I2C
+
+
+def attach_i2c(device, sda=0, scl=1):
+    # Connects an I2C device model (anything with addr, max_freq, i2c_write
+    # and i2c_read) to the wire pair sda/scl. Like a real bus, the pair has
+    # pull-up resistors, so both lines idle high.
+    devices.setdefault(('i2c', (sda, scl)), []).append(device)
+    drive(sda, 1)
+    drive(scl, 1)
+    return device
+
+
+def _id_of(pin):
+    if isinstance(pin, Pin):
+        return pin._state.id
+    return Pin._BOARD.get(pin, pin)
+
+
+class Timer:
+
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, timer_id=-1, *, mode=PERIODIC, period=-1, freq=-1,
+                 tick_hz=1000, callback=None):
+        self._event = None
+        if callback is not None:
+            self.init(mode=mode, period=period, freq=freq, tick_hz=tick_hz,
+                      callback=callback)
+
+    def init(self, *, mode=PERIODIC, period=-1, freq=-1, tick_hz=1000,
+             callback=None):
+        self.deinit()
+        if freq > 0:
+            period_us = 1000000 / freq
+        else:
+            period_us = period * 1000000 / tick_hz
+        self._mode = mode
+        self._period_us = max(1, int(round(period_us)))
+        self._callback = callback
+        self._start = clock.now_us
+        self._n = 1
+        self._event = clock.schedule_at(self._start + self._period_us,
+                                        self._fire)
+
+    def _fire(self):
+        self._event = None
+        if self._mode == Timer.PERIODIC:
+            self._n += 1
+            self._event = clock.schedule_at(
+                self._start + self._n * self._period_us, self._fire)
+        recorder.record('timer', id(self), clock.now_us)
+        if self._callback is not None:
+            self._callback(self)
+
+    def deinit(self):
+        clock.cancel(self._event)
+        self._event = None
+
+
+class _SioRegisters:
+    # Just enough of the RP2040 SIO block for mem32 port writes to GPIO_OUT.
+
+    SIO_BASE = 0xd0000000
+    GPIO_IN = 0x004
+    GPIO_OUT = 0x010
+    GPIO_OUT_SET = 0x014
+    GPIO_OUT_CLR = 0x018
+    GPIO_OUT_XOR = 0x01c
+
+    def __getitem__(self, addr):
+        offset = addr - self.SIO_BASE
+        if offset in (self.GPIO_IN, self.GPIO_OUT):
+            mask = 0
+            for pin_id, state in _pins.items():
+                if isinstance(pin_id, int) and pin_id < 30 and (
+                        state.level if offset == self.GPIO_IN else state.out):
+                    mask |= 1 << pin_id
+            return mask
+        return 0
+
+    def __setitem__(self, addr, mask):
+        offset = addr - self.SIO_BASE
+        recorder.record('mem32', addr, mask)
+        changed = []
+        for pin_id, state in _pins.items():
+            if not isinstance(pin_id, int) or pin_id >= 30:
+                continue
+            bit = (mask >> pin_id) & 1
+            if offset == self.GPIO_OUT:
+                new = bit
+            elif offset == self.GPIO_OUT_SET:
+                new = state.out | bit
+            elif offset == self.GPIO_OUT_CLR:
+                new = state.out & (bit ^ 1)
+            elif offset == self.GPIO_OUT_XOR:
+                new = state.out ^ bit
+            else:
+                return
+            if new != state.out:
+                state.out = new
+                changed.append(state)
+        # All lines of a port write change together; listeners see the
+        # final state of every line.
+        for state in changed:
+            state.resolve()
+
+
+mem32 = _SioRegisters()
+
+
+def time_pulse_us(pin, pulse_level, timeout_us=1000000):
+    start = clock.now_us
+    while pin.value() != pulse_level:
+        if clock.now_us - start >= timeout_us:
+            return -2
+    start = clock.now_us
+    while pin.value() == pulse_level:
+        if clock.now_us - start >= timeout_us:
+            return -1
+    return clock.now_us - start
+
+
+_freq = 125000000
+
+
+def freq(hz=None):
+    global _freq
+    if hz is None:
+        return _freq
+    _freq = hz
+
+
+def idle():
+    at = clock.next_event_us()
+    if at is None or at - clock.now_us > 1000:
+        clock.advance(1000)
+    else:
+        clock.advance_to(at)
+
+
+def lightsleep(time_ms=None):
+    if time_ms is None:
+        idle()
+    else:
+        clock.advance(time_ms * 1000)
+
+
+deepsleep = lightsleep
+
+
+def disable_irq():
+    return 0
+
+
+def enable_irq(state=0):
+    pass
+
+
+def unique_id():
+    return b'\xe6\x60\x58\x38\x83\x2a\x2b\x2c'
+
+
+def reset():
+    raise SystemExit('machine.reset()')
+
+
+soft_reset = reset
+
+
+def _reset():
+    _pins.clear()
@@ -0,0 +1,38 @@
+# Host stand-in for MicroPython's micropython module.
+
+
+def const(value):
+    return value
+
+
+def native(func):
+    return func
+
+
+viper = native
+
+
+def schedule(func, arg):
+    # Soft IRQ handlers run straight away; the virtual clock never
+    # interrupts Python code half way through.
+    func(arg)
+
+
+def alloc_emergency_exception_buf(size):
+    pass
+
+
+def opt_level(level=None):
+    return 0
+
+
+def mem_info(verbose=False):
+    print('mem: not tracked on the host')
+
+
+def heap_lock():
+    return 0
+
+
+def heap_unlock():
+    return 0
@@ -0,0 +1,68 @@
+# Runs one of the board scripts on the host against the simulated machine,
+# utime and dht modules, for a given amount of virtual time.
+#
+#   python sim/run.py weather_monitor/weather_monitor_dht.py
+#   python sim/run.py --seconds 60 --board ultrasonic ultrasonic_door_control.py
+#
+# Afterwards it prints what the attached LCDs show and the recorded
+# counters: pin transitions, I2C transactions and bytes, enforced sleep...
+
+import argparse
+import os
+import runpy
+import sys
+
+import simcore
+import boards
+
+LIB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))), 'lib')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('script')
+    parser.add_argument('--board', choices=sorted(boards.BOARDS),
+                        help='device setup (default: chosen by script name)')
+    parser.add_argument('--seconds', type=float, default=10.0,
+                        help='virtual time to run for (default 10)')
+    parser.add_argument('--trace', action='store_true',
+                        help='print every recorded event')
+    args = parser.parse_args(argv)
+
+    board = args.board or boards.SCRIPTS.get(os.path.basename(args.script))
+    if board is None:
+        parser.error('no default board for %s, pass --board' % args.script)
+
+    simcore.install()
+    simcore.reset()
+    simcore.recorder.enabled = args.trace
+    models = boards.BOARDS[board]()
+    # Like the board: the script's own directory first, then /lib.
+    sys.path[:0] = [os.path.dirname(os.path.abspath(args.script)), LIB]
+    timed_out = simcore.run_for(args.seconds, runpy.run_path, args.script,
+                                run_name='__main__')
+
+    print('--- %s on board %s: %.6f s virtual time%s' % (
+        args.script, board, simcore.clock.now_us / 1000000,
+        ' (time limit)' if timed_out else ''))
+    for name, model in models.items():
+        if hasattr(model, 'lcd'):
+            print('%s:' % name)
+            for line in model.lcd.lines():
+                print('  |%s|' % line)
+            print('  latches=%d violations=%d' % (model.lcd.latches,
+                                                  model.lcd.violations))
+    runtime = sys.modules.get('runtime')
+    if runtime is not None:
+        for name in sorted(runtime.lateness):
+            print('late %-14s %d ms' % (name, runtime.lateness[name]))
+    for kind in sorted(simcore.recorder.counters):
+        print('%-12s %d' % (kind, simcore.recorder.counters[kind]))
+    if args.trace:
+        for event in simcore.recorder.events:
+            print('%12d %-12s %s %s' % event)
+
+
+if __name__ == '__main__':
+    main()
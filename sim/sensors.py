@@ -0,0 +1,168 @@
+# Scriptable models of the sensors used in this project: DHT11/DHT22
+# temperature/humidity sensors and HC-SR04 ultrasonic rangers.
+#
+# Readings can be constants, sequences (one entry per measurement) or
+# callables of the virtual time in seconds, which makes it easy to replay a
+# recorded trace or a synthetic disturbance.
+
+import errno
+import random
+
+from simcore import clock, recorder, devices
+import machine
+
+
+def _value_at(source, index):
+    if callable(source):
+        return source(clock.now_us / 1000000)
+    if isinstance(source, (list, tuple)):
+        return source[min(index, len(source) - 1)]
+    return source
+
+
+class DhtModel:
+    # One DHT sensor on a data pin.
+    #
+    # measure() costs the bit-banged read time on the virtual clock. Reads
+    # closer together than the sensor's minimum interval return the previous
+    # conversion again, as the real parts do. fail_rate (0..1) or the
+    # `faults` set of measurement indexes make reads raise OSError.
+
+    READ_US = {'DHT11': 23000, 'DHT22': 6000}
+    MIN_INTERVAL_US = {'DHT11': 1000000, 'DHT22': 2000000}
+
+    def __init__(self, pin, model='DHT22', temperature=21.5, humidity=45.0,
+                 fail_rate=0.0, faults=(), seed=1):
+        self.pin = pin
+        self.model = model
+        self.temperature = temperature
+        self.humidity = humidity
+        self.fail_rate = fail_rate
+        self.faults = set(faults)
+        self.random = random.Random(seed)
+        self.reads = 0
+        self.failures = 0
+        self.too_fast = 0
+        self.last_us = None
+        self.last = None
+        devices[('dht', pin)] = self
+
+    def measure(self):
+        index = self.reads
+        self.reads += 1
+        recorder.record('dht_read', self.pin, index)
+        clock.advance(self.READ_US[self.model])
+        if index in self.faults or self.random.random() < self.fail_rate:
+            self.failures += 1
+            raise OSError(errno.ETIMEDOUT)
+        now = clock.now_us
+        if (self.last is not None and
+                now - self.last_us < self.MIN_INTERVAL_US[self.model]):
+            self.too_fast += 1
+            return self.last
+        self.last_us = now
+        self.last = (_value_at(self.temperature, index),
+                     _value_at(self.humidity, index))
+        return self.last
+
+
+class Hcsr04:
+    # HC-SR04 on a trigger/echo pin pair.
+    #
+    # A trigger pulse of at least MIN_TRIGGER_US starts a ping: after the
+    # burst the echo line goes high for the round trip time to the target
+    # and then low. distance_cm may be a constant, sequence (per ping) or
+    # callable of time; None means nothing in range, which holds echo high
+    # for the sensor's 38 ms timeout. lost=True models a broken echo wire.
+    #
+    # Sensors that share a `field` hear each other: if a neighbour pinged
+    # within LISTEN_US before this sensor's echo would arrive, the
+    # neighbour's echo ends this one early (crosstalk).
+
+    MIN_TRIGGER_US = 2
+    BURST_US = 450
+    TIMEOUT_US = 38000
+    US_PER_CM = 2 / 0.0343
+    LISTEN_US = 25000
+
+    def __init__(self, trigger, echo, distance_cm=100.0, lost=False,
+                 field=None):
+        self.trigger = trigger
+        self.echo = echo
+        self.distance_cm = distance_cm
+        self.lost = lost
+        self.field = field
+        self.pings = 0
+        self.crosstalk = 0
+        self.rise_us = None
+        self.busy_until = 0
+        self.last_burst_us = None
+        self.last_echo_us = None
+        if field is not None:
+            field.append(self)
+        machine.drive(echo, 0)
+        machine.on_pin_change(trigger, self._trigger_changed)
+        devices[('hcsr04', trigger)] = self
+
+    def _trigger_changed(self, level):
+        now = clock.now_us
+        if level:
+            self.rise_us = now
+            return
+        if self.rise_us is None or now - self.rise_us < self.MIN_TRIGGER_US:
+            return
+        if now < self.busy_until:
+            return
+        index = self.pings
+        self.pings += 1
+        recorder.record('ping', self.trigger, index)
+        distance = _value_at(self.distance_cm, index)
+        burst = now + self.BURST_US
+        if distance is None:
+            echo_us = self.TIMEOUT_US
+        else:
+            echo_us = int(distance * self.US_PER_CM)
+        self.last_burst_us = burst
+        self.last_echo_us = echo_us
+        if self.field is not None:
+            for other in self.field:
+                if other is self or other.last_burst_us is None:
+                    continue
+                heard = other.last_burst_us + other.last_echo_us - burst
+                if 0 < heard < echo_us and burst - other.last_burst_us < (
+                        self.LISTEN_US):
+                    echo_us = heard
+                    self.crosstalk += 1
+                    recorder.record('crosstalk', self.trigger, other.trigger)
+        self.busy_until = burst + max(echo_us, 0) + 100
+        if self.lost:
+            return
+        clock.schedule_at(burst, lambda: machine.drive(self.echo, 1))
+        clock.schedule_at(burst + echo_us,
+                          lambda: machine.drive(self.echo, 0))
+
+
+def pulse_train(pin, period_s, high_s, first_s=0.0, level=1, bounces=0):
+    # Drives pin to `level` for high_s seconds every period_s seconds,
+    # starting at first_s, and to the opposite level in between. Models a
+    # switch, IR obstacle sensor or presence detector. With bounces, every
+    # change of level chatters that many times, 300 usec apart, before it
+    # settles.
+    machine.drive(pin, level ^ 1)
+    period_us = int(period_s * 1000000)
+    high_us = int(high_s * 1000000)
+
+    def settle(to):
+        machine.drive(pin, to)
+        for i in range(1, 2 * bounces + 1):
+            clock.schedule(300 * i, lambda v=to ^ (i & 1): machine.drive(pin, v))
+
+    def rise():
+        settle(level)
+        clock.schedule(high_us, fall)
+        clock.schedule(period_us, rise)
+
+    def fall():
+        settle(level ^ 1)
+
+    clock.schedule(int(first_s * 1000000), rise)
@@ -0,0 +1,178 @@
+# Virtual time base and event recorder shared by the simulated machine,
+# utime and dht modules.
+#
+# Nothing here ever really sleeps. Every sleep, bus transfer and pin read
+# advances a virtual microsecond clock, and anything scheduled on that clock
+# (timer callbacks, echo edges from a sensor model, ...) fires in order as
+# the clock passes it. Scripts written for the board can therefore run on a
+# PC many times faster than real time, and every pin transition, I2C
+# transaction and enforced delay is available afterwards for inspection.
+
+import heapq
+import sys
+import time as _host_time
+
+
+class SimTimeLimit(BaseException):
+    # Raised when the virtual clock passes Clock.limit_us. Derived from
+    # BaseException so that `except Exception` / `except OSError` blocks in
+    # the scripts under test do not swallow it.
+    pass
+
+
+class Clock:
+
+    # Virtual microseconds charged for every Pin.value() read. This is what
+    # lets busy-wait loops such as `while echo.value() == 0` make progress.
+    READ_COST_US = 2
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.now_us = 0
+        self.limit_us = None
+        self._events = []
+        self._seq = 0
+        self._firing = False
+
+    def schedule_at(self, at_us, callback):
+        # Schedules callback() to run when the clock reaches at_us. Returns a
+        # handle that can be passed to cancel().
+        self._seq += 1
+        event = [at_us, self._seq, callback]
+        heapq.heappush(self._events, event)
+        return event
+
+    def schedule(self, delay_us, callback):
+        return self.schedule_at(self.now_us + delay_us, callback)
+
+    def cancel(self, event):
+        if event is not None:
+            event[2] = None
+
+    def next_event_us(self):
+        while self._events and self._events[0][2] is None:
+            heapq.heappop(self._events)
+        if self._events:
+            return self._events[0][0]
+        return None
+
+    def advance(self, delta_us):
+        self.advance_to(self.now_us + max(0, int(delta_us)))
+
+    def advance_to(self, target_us):
+        if self.limit_us is not None and target_us >= self.limit_us:
+            target_us = self.limit_us
+            self._run_until(target_us)
+            self.now_us = target_us
+            raise SimTimeLimit(target_us)
+        self._run_until(target_us)
+        if target_us > self.now_us:
+            self.now_us = target_us
+
+    def _run_until(self, target_us):
+        if self._firing:
+            # A callback is sleeping; just move time, the outer loop will pick
+            # up anything that became due.
+            return
+        self._firing = True
+        try:
+            while True:
+                at = self.next_event_us()
+                if at is None or at > target_us:
+                    break
+                event = heapq.heappop(self._events)
+                if at > self.now_us:
+                    self.now_us = at
+                callback = event[2]
+                callback()
+        finally:
+            self._firing = False
+
+
+class Recorder:
+    # Counts every recorded event by kind and, when enabled, keeps the full
+    # (time_us, kind, name, value) trace.
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.enabled = False
+        self.events = []
+        self.counters = {}
+
+    def record(self, kind, name=None, value=None):
+        self.counters[kind] = self.counters.get(kind, 0) + 1
+        if self.enabled:
+            self.events.append((clock.now_us, kind, name, value))
+
+    def add(self, counter, amount):
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def count(self, kind):
+        return self.counters.get(kind, 0)
+
+
+clock = Clock()
+recorder = Recorder()
+
+# Device models attached to the simulated board, keyed by
+# ('dht', pin_id), ('i2c', bus_id), ...
+devices = {}
+
+
+def reset():
+    # Returns the simulated board to power-on state: virtual time zero, no
+    # trace, no pins, no attached devices.
+    import machine
+    clock.reset()
+    recorder.reset()
+    devices.clear()
+    machine._reset()
+
+
+_saved_time = {}
+
+
+def install():
+    # Makes the MicroPython-only helpers of `time` (sleep_ms, sleep_us,
+    # ticks_*) available on the host `time` module and routes its sleeps
+    # through the virtual clock. The drivers use `time` and `utime`
+    # interchangeably, as MicroPython does.
+    import utime
+    if _saved_time:
+        return
+    for name in ('sleep', 'sleep_ms', 'sleep_us', 'ticks_ms', 'ticks_us',
+                 'ticks_cpu', 'ticks_diff', 'ticks_add', 'localtime',
+                 'time'):
+        _saved_time[name] = getattr(_host_time, name, None)
+        setattr(_host_time, name, getattr(utime, name))
+
+
+def uninstall():
+    for name, value in _saved_time.items():
+        if value is None:
+            delattr(_host_time, name)
+        else:
+            setattr(_host_time, name, value)
+    _saved_time.clear()
+
+
+def run_for(seconds, func, *args, **kwargs):
+    # Calls func(*args, **kwargs) until it returns or `seconds` of virtual
+    # time have passed, whichever comes first. Returns True if the limit was
+    # hit.
+    clock.limit_us = clock.now_us + int(seconds * 1000000)
+    try:
+        func(*args, **kwargs)
+    except SimTimeLimit:
+        return True
+    finally:
+        clock.limit_us = None
+    return False
+
+
+if __name__ == '__main__':
+    sys.exit('simcore is a library; use sim/run.py to run a script')
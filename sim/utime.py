@@ -0,0 +1,81 @@
+# Host stand-in for MicroPython's utime: every sleep advances the virtual
+# clock in simcore and is accounted for as enforced delay.
+
+from simcore import clock, recorder
+
+_EPOCH = 1704067200     # 2024-01-01 00:00:00, the virtual power-on moment
+
+_TICKS_PERIOD = 1 << 30
+_TICKS_MAX = _TICKS_PERIOD - 1
+_TICKS_HALFPERIOD = _TICKS_PERIOD // 2
+
+
+def _sleep(usecs):
+    usecs = int(usecs)
+    if usecs < 0:
+        usecs = 0
+    if clock.limit_us is not None:
+        # Only account for the part that happens before the run ends.
+        usecs = min(usecs, clock.limit_us - clock.now_us)
+    recorder.record('sleep', None, usecs)
+    recorder.add('sleep_us', usecs)
+    clock.advance(usecs)
+
+
+def sleep(seconds):
+    _sleep(seconds * 1000000)
+
+
+def sleep_ms(msecs):
+    _sleep(msecs * 1000)
+
+
+def sleep_us(usecs):
+    _sleep(usecs)
+
+
+def ticks_us():
+    return clock.now_us & _TICKS_MAX
+
+
+def ticks_ms():
+    return (clock.now_us // 1000) & _TICKS_MAX
+
+
+def ticks_cpu():
+    return ticks_us()
+
+
+def ticks_add(ticks, delta):
+    return (ticks + delta) & _TICKS_MAX
+
+
+def ticks_diff(ticks1, ticks2):
+    diff = (ticks1 - ticks2) & _TICKS_MAX
+    return ((diff + _TICKS_HALFPERIOD) & _TICKS_MAX) - _TICKS_HALFPERIOD
+
+
+def time():
+    return _EPOCH + clock.now_us // 1000000
+
+
+def time_ns():
+    return (_EPOCH * 1000000 + clock.now_us) * 1000
+
+
+def localtime(secs=None):
+    import time as _host_time
+    if secs is None:
+        secs = time()
+    t = _host_time.gmtime(secs)
+    # MicroPython: (year, month, mday, hour, minute, second, weekday, yearday)
+    return (t.tm_year, t.tm_mon, t.tm_mday, t.tm_hour, t.tm_min, t.tm_sec,
+            t.tm_wday, t.tm_yday)
+
+
+gmtime = localtime
+
+
+def mktime(t):
+    import calendar
+    return calendar.timegm(tuple(t[:6]) + (0, 0, 0))
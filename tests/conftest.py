@@ -0,0 +1,21 @@
+# Runs the lib/ modules against the simulated board in sim/.
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, 'sim'), os.path.join(ROOT, 'lib')]
+
+import simcore                  # noqa: E402
+
+simcore.install()
+
+
+@pytest.fixture(autouse=True)
+def board():
+    # Every test starts from a powered-up board at virtual time zero.
+    simcore.reset()
+    yield
+    simcore.reset()
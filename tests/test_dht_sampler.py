@@ -0,0 +1,18 @@
+import dht
+import machine
+import pytest
+import sensors
+from simcore import clock
+
+from dht_sampler import DhtSampler
+
+
+@pytest.mark.parametrize('humidity', [15, 95])
+def test_dht11_publishes_humidity_outside_accuracy_band(humidity):
+    sensors.DhtModel(22, 'DHT11', temperature=21, humidity=humidity)
+    sampler = DhtSampler(dht.DHT11(machine.Pin(22)))
+    clock.advance(1000000)
+    assert sampler.update()
+    assert sampler.read()[:2] == (21, humidity)
+    assert not sampler.stale
+    assert sampler.rejected == 0
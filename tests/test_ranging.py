@@ -0,0 +1,62 @@
+import machine
+import sensors
+from simcore import clock, devices
+
+from hcsr04 import HCSR04
+from ranging import Ranger
+
+
+def make_ranger(far):
+    # Two sensors pinging together: one sees a wall at 50 cm, the other
+    # nothing within range (distance far).
+    sensors.Hcsr04(2, 3, distance_cm=50.0)
+    sensors.Hcsr04(4, 5, distance_cm=far)
+    pin = machine.Pin
+    return Ranger([HCSR04(pin(2), pin(3)), HCSR04(pin(4), pin(5))],
+                  groups=[(0, 1)])
+
+
+def run(ranger, ms):
+    for _ in range(ms):
+        ranger.step()
+        clock.advance(1000)
+
+
+def test_timed_out_echo_publishes_only_real_pings():
+    ranger = make_ranger(None)
+    run(ranger, 500)
+    while ranger.active:
+        # Let the group in flight finish before counting.
+        ranger.step()
+        clock.advance(1000)
+    assert abs(ranger.read(0)[0] - 50.0) < 1.0
+    assert ranger.read(1)[0] == Ranger.NO_ECHO
+    # The far sensor is still ringing when the next slot starts, so it
+    # misses every other slot; those must not count as readings.
+    pings = devices[('hcsr04', 2)].pings + devices[('hcsr04', 4)].pings
+    assert ranger.skipped > 0
+    assert ranger.samples == pings
+
+
+def test_sensor_busy_in_its_first_slot():
+    ranger = make_ranger(80.0)
+    # An echo left over from before the ranger started.
+    machine.drive(5, 1)
+    clock.schedule(30000, lambda: machine.drive(5, 0))
+    run(ranger, 20)
+    assert ranger.read(0)[0] is not None
+    assert ranger.read(1) == (None, 0)
+    run(ranger, 200)
+    assert abs(ranger.read(1)[0] - 80.0) < 1.0
+
+
+def test_start_runs_from_the_timer():
+    ranger = make_ranger(120.0)
+    ranger.start()
+    clock.advance(300000)
+    ranger.stop()
+    assert abs(ranger.read(0)[0] - 50.0) < 1.0
+    assert abs(ranger.read(1)[0] - 120.0) < 1.0
+    assert ranger.samples > 10
+    # Published from a hard IRQ, so only integers go into the table.
+    assert ranger.widths.typecode == 'i'
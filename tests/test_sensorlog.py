@@ -0,0 +1,47 @@
+import os
+
+import sensorlog
+from sensorlog import SensorLog
+
+
+class Recording:
+    # A file that records where each write lands.
+
+    def __init__(self, f, writes):
+        self.f = f
+        self.writes = writes
+
+    def write(self, data):
+        self.writes.append((self.f.tell(), os.fstat(self.f.fileno()).st_size))
+        return self.f.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.f, name)
+
+
+def test_flush_appends_one_write(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    writes = []
+    monkeypatch.setattr(sensorlog, 'open', lambda *args: Recording(
+        open(*args), writes), raising=False)
+    log = SensorLog(files=2, block_size=64, blocks_per_file=4)
+    del writes[:]
+    for t in range(10):
+        log.append(t, 20.0, 50.0)
+    assert log.flushes == 1
+    # One write per flush, always at the end of the file.
+    assert len(writes) == 1
+    assert all(pos == size for pos, size in writes)
+
+
+def test_read_since_spans_blocks_and_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    log = SensorLog(files=3, block_size=64, blocks_per_file=4)
+    for t in range(0, 150, 2):
+        log.append(t, t / 10.0, 1.5)
+    got = [t for t, _ in log.read(since=37, until=101)]
+    assert got == list(range(38, 101, 2))
+    assert list(log.read(since=148)) == [(148, (14.8, 1.5))]
+    log.close()
+    reopened = SensorLog(files=3, block_size=64, blocks_per_file=4)
+    assert [t for t, _ in reopened.read(since=140)] == list(range(140, 150, 2))
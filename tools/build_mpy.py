@@ -0,0 +1,53 @@
+# Precompiles the shared modules in lib/ to .mpy with mpy-cross, for
+# boards running stock firmware. Importing a .mpy skips the on-device
+# compile step, which saves boot time and the heap the compiler needs.
+#
+#   pip install mpy-cross
+#   python tools/build_mpy.py
+#   mpremote mkdir :lib; mpremote cp build/lib/*.mpy :lib/
+#
+# The firmware's /lib directory is on sys.path, so the application scripts
+# import the drivers unchanged. To freeze them into the firmware instead,
+# see lib/manifest.py.
+
+import argparse
+import glob
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LIB = os.path.join(ROOT, 'lib')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='compile lib/ to .mpy with mpy-cross')
+    parser.add_argument('--out', default=os.path.join(ROOT, 'build', 'lib'),
+                        help='output directory (default build/lib)')
+    parser.add_argument('--mpy-cross', default='mpy-cross',
+                        help='mpy-cross executable')
+    parser.add_argument('--march', default='armv6m',
+                        help='native code architecture (default armv6m, '
+                             'the RP2040)')
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.out, exist_ok=True)
+    for source in sorted(glob.glob(os.path.join(LIB, '*.py'))):
+        name = os.path.basename(source)
+        if name == 'manifest.py':
+            continue
+        target = os.path.join(args.out, name[:-3] + '.mpy')
+        command = [args.mpy_cross, '-march=' + args.march, '-O1',
+                   '-o', target, source]
+        try:
+            subprocess.check_call(command)
+        except FileNotFoundError:
+            sys.exit('%s not found; pip install mpy-cross' % args.mpy_cross)
+        print('%s -> %s (%d -> %d bytes)' % (
+            name, os.path.relpath(target, ROOT), os.path.getsize(source),
+            os.path.getsize(target)))
+
+
+if __name__ == '__main__':
+    main()
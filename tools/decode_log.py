@@ -0,0 +1,81 @@
+# Decodes the binary sensor logs written by lib/sensorlog.py into CSV.
+#
+#   mpremote cp :log0.bin :log1.bin :log2.bin :log3.bin logs/
+#   python tools/decode_log.py --names temperature,humidity logs/log*.bin
+#
+# Files are put in the order they were written, whatever their names, and
+# records cut short by a reset are skipped. --epoch adds an ISO 8601 time
+# column, for boards whose time() counts from that year's 1st of January.
+
+import argparse
+import csv
+import datetime
+import os
+import struct
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'lib'))
+
+from sensorlog import HEADER, HEADER_SIZE, MAGIC, VERSION  # noqa: E402
+
+
+def load(path):
+    # Returns (seq, fields, scale, records) of one log file.
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, fields, scale, seq, per_block, blocks = struct.unpack_from(
+        HEADER, data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('%s: not a sensor log' % path)
+    record = struct.Struct('<I' + 'h' * fields)
+    count = (len(data) - HEADER_SIZE) // record.size
+    records = [record.unpack_from(data, HEADER_SIZE + i * record.size)
+               for i in range(count)]
+    return seq, fields, scale, records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='decode sensor log files to CSV')
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('--names',
+                        help='comma separated column names for the fields')
+    parser.add_argument('--epoch', type=int,
+                        help='year the timestamps count from, e.g. 1970')
+    parser.add_argument('--since', type=int, default=0,
+                        help='skip records before this timestamp')
+    parser.add_argument('-o', '--output', help='CSV file (default stdout)')
+    args = parser.parse_args(argv)
+
+    logs = sorted(load(path) for path in args.files)
+    fields = logs[0][1]
+    if any(log[1] != fields for log in logs):
+        parser.error('files hold different record layouts')
+    names = args.names.split(',') if args.names else [
+        'field%d' % i for i in range(fields)]
+    if len(names) != fields:
+        parser.error('%d names given for %d fields' % (len(names), fields))
+
+    out = open(args.output, 'w', newline='') if args.output else sys.stdout
+    writer = csv.writer(out)
+    header = ['timestamp'] + names
+    if args.epoch is not None:
+        epoch = datetime.datetime(args.epoch, 1, 1)
+        header.insert(1, 'time')
+    writer.writerow(header)
+    for seq, fields, scale, records in logs:
+        for record in records:
+            if record[0] < args.since:
+                continue
+            row = [record[0]] + [v / scale for v in record[1:]]
+            if args.epoch is not None:
+                row.insert(1, (epoch + datetime.timedelta(
+                    seconds=record[0])).isoformat())
+            writer.writerow(row)
+    if out is not sys.stdout:
+        out.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,28 +1,25 @@
 from machine import Pin
 import utime  
+from hcsr04 import HCSR04
+from distfilter import MedianFilter, Presence
 
-trigger = Pin(16, Pin.OUT) 
-echo = Pin(17, Pin.IN)
+sonar = HCSR04(Pin(16, Pin.OUT), Pin(17, Pin.IN))
 led = Pin(18, Pin.OUT) 
+smooth = MedianFilter(5)
+door = Presence(enter_cm=50, exit_cm=70)
 temp = 0
 while True:
-    trigger.high()  
-    utime.sleep_us(5)  
-    trigger.low() 
-    while echo.value() == 0:  
-        signaloff = utime.ticks_us()  
-    while echo.value() == 1:
-        signalon = utime.ticks_us()
-        timepassed = signalon - signaloff 
-        dist = (timepassed * 0.0343) / 2
-        distance = round(dist, 2)
-        print(distance)
+    distance = sonar.read()
+    if distance is None:
+        distance = 400
+    distance = smooth.update(distance)
     
-    if distance < 50:
+    if door.update(distance):
+        print(round(distance, 2))
         if temp == 0: 
             temp = 1
         else: 
             temp = 0  
     if temp == 1:led.on()
     else:led.off()
-    utime.sleep(2)
\ No newline at end of file
+    utime.sleep_ms(60)
\ No newline at end of file